@@ -10,16 +10,33 @@ Version: 1.0.0
 License: MIT
 """
 
-from flask import Flask, jsonify, request, Response
+import time
+
+# Captured before any other import so cold-start profiling covers import time
+_IMPORT_START = time.perf_counter()
+
+from flask import Flask, g, jsonify, redirect, request, send_file, Response
 from flask_cors import CORS
 from functools import wraps
 from typing import Dict, List, Any, Optional, Tuple
+import hashlib
+import hmac
 import json
 import os
-import time
+import sys
 import logging
+import re
+import threading
+import tracemalloc
+import unicodedata
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+_IMPORTS_DONE = time.perf_counter()
+
 # =============================================================================
 # APPLICATION SETUP
 # =============================================================================
@@ -39,12 +56,14 @@ CORS(app, resources={
         "origins": "*",
         "methods": ["GET", "POST", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization", "Accept", "Origin"],
-        "expose_headers": ["Content-Type", "X-Response-Time"],
+        "expose_headers": ["Content-Type", "X-Response-Time", "X-Cache", "Retry-After"],
         "supports_credentials": False,
         "max_age": 3600
     }
 })
 
+_APP_SETUP_DONE = time.perf_counter()
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -53,10 +72,81 @@ class Config:
     """Application configuration"""
     # Use absolute path for data file to work in serverless environment
     DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'apps.json')
+    # Sidecar written by scripts/update_data.py next to the data file
+    # Sharded layout written by scripts/update_data.py; preferred over DATA_FILE
+    SHARD_ROOT = os.path.join('shards', 'root.json')
+    SHARD_LOAD_WORKERS = 8
+    # Shard names are content hashes that CI checks on every update, so the
+    # API trusts the shard root unless verification is asked for
+    VERIFY_SHARDS = os.environ.get('DROIDX_VERIFY_SHARDS', '0') == '1'
+    # Thumbnails mirrored by scripts/update_data.py (MIRROR_ICONS=1)
+    ICONS_DIR = os.path.join(os.path.dirname(DATA_FILE), 'icons')
+    ICON_INDEX_NAME = 'index.json'
+    ICON_SIZES = (48, 96, 192)
+    ICON_FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+    DEFAULT_ICON_SIZE = 96
+    # Icons: one week by default, a year when the URL pins the content hash
+    ICON_MAX_AGE = 7 * 24 * 3600
+    ICON_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
     API_VERSION = '1.0.0'
     API_NAME = 'DroidX'
     MAX_SEARCH_RESULTS = None
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    # Device compatibility: Android 14+ refuses to install apps targeting older SDKs
+    MIN_TARGET_SDK_BY_DEVICE_SDK = ((34, 23),)
+    MAX_SDK_LEVEL = 100
+    # Fields accepted by ?sort= on list endpoints
+    SORT_FIELDS = ('name', 'added', 'last_updated', 'size', 'min_sdk', 'target_sdk')
+    MAX_BATCH_SIZE = 1000
+    # Streaming export: bytes buffered before each chunk is flushed
+    EXPORT_CHUNK_SIZE = 64 * 1024
+    DEFAULT_SUGGESTIONS = 8
+    MAX_SUGGESTIONS = 20
+    # Similar apps: neighbor table written by the updater next to the data
+    SIMILAR_NAME = 'similar.json'
+    SIMILAR_TOP_K = 20
+    DEFAULT_SIMILAR = 10
     CACHE_CONTROL = 'no-cache, no-store, must-revalidate'
+    # Repository attributed to apps from data files that predate multi-repo ingestion
+    DEFAULT_REPO = 'fdroid'
+    RESPONSE_CACHE_SIZE = int(os.environ.get('DROIDX_RESPONSE_CACHE_SIZE', 512))
+    RESPONSE_CACHE_TTL = float(os.environ.get('DROIDX_RESPONSE_CACHE_TTL', 300))
+    # Byte budget across all cached bodies, and the largest body worth caching
+    RESPONSE_CACHE_BYTES = int(os.environ.get('DROIDX_RESPONSE_CACHE_BYTES', 64 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = int(
+        os.environ.get('DROIDX_RESPONSE_CACHE_MAX_ENTRY_BYTES', 8 * 1024 * 1024)
+    )
+    # Response fields regenerated per request instead of replayed from the cache
+    VOLATILE_RESPONSE_FIELDS = ('timestamp', '_response_time_ms')
+    # Enum parameters that views match case-insensitively; lowercased in cache keys
+    CASE_INSENSITIVE_PARAMS = frozenset({'sort', 'order', 'scope'})
+    # Admission control: concurrent heavy requests, bounded wait queue, wait (s)
+    MAX_CONCURRENT_HEAVY = int(os.environ.get('DROIDX_MAX_CONCURRENT_HEAVY', 4))
+    MAX_HEAVY_QUEUE = int(os.environ.get('DROIDX_MAX_HEAVY_QUEUE', 16))
+    HEAVY_QUEUE_TIMEOUT = float(os.environ.get('DROIDX_HEAVY_QUEUE_TIMEOUT', 2))
+    RETRY_AFTER_SECONDS = 1
+    # Endpoints that serialize large parts of the catalog or do bulk work
+    HEAVY_ENDPOINTS = frozenset({
+        'get_all', 'get_apps', 'get_games', 'get_latest',
+        'get_category_apps', 'search', 'export_ndjson', 'debug_memory',
+        'get_compatible_apps'
+    })
+    # Heavy endpoints that slice a ready-made list with page/per_page, and so
+    # are cheap when paginated. search and get_compatible_apps scan the whole
+    # catalog before slicing, so they stay heavy on every cache miss
+    PAGINATED_ENDPOINTS = frozenset({
+        'get_all', 'get_apps', 'get_games', 'get_category_apps'
+    })
+    # Token required by /debug/memory; the endpoint is disabled when unset
+    DEBUG_TOKEN = os.environ.get('DROIDX_DEBUG_TOKEN')
+    MEMORY_TRACE_TOP = 15
+    # Load data in a background thread so module import returns immediately
+    BACKGROUND_LOAD = os.environ.get('DROIDX_BACKGROUND_LOAD', '1') != '0'
+    # Seconds a request waits for a background load before failing with 503
+    DATA_READY_TIMEOUT = float(os.environ.get('DROIDX_DATA_READY_TIMEOUT', 10))
+    # Log a phase-by-phase cold-start report once data is ready
+    PROFILE_STARTUP = os.environ.get('DROIDX_PROFILE_STARTUP', '0') == '1'
 
 
 # =============================================================================
@@ -77,36 +167,104 @@ class DataStore:
             data_file: Path to the JSON data file
         """
         self.data_file = data_file
+        # File the current snapshot was read from (DATA_FILE or the shard root)
+        self.source_file = data_file
         self._apps: List[Dict[str, Any]] = []
         self._metadata: Dict[str, Any] = {}
         self._last_loaded: Optional[float] = None
+        self._load_count = 0
+        self._version: str = ''
+        # Reverse indexes: name -> positions in self._apps, for latest/any package
+        self._permission_index: Dict[str, Dict[str, List[int]]] = {'latest': {}, 'any': {}}
+        self._feature_index: Dict[str, Dict[str, List[int]]] = {'latest': {}, 'any': {}}
+        # APK indexes: lowercase hash / file name -> (app position, package position)
+        self._hash_index: Dict[str, Tuple[int, int]] = {}
+        self._apk_name_index: Dict[str, Tuple[int, int]] = {}
+        # Prefix indexes: parallel sorted key / app position arrays.
+        # Primary holds whole names and ids, secondary holds name words and id segments.
+        self._prefix_keys: List[List[str]] = [[], []]
+        self._prefix_positions: List[List[int]] = [[], []]
+        self._suggestions: List[Dict[str, Any]] = []
+        self._load_timings: Dict[str, Any] = {}
+        self._id_index: Dict[str, int] = {}
+        self._repositories: List[Dict[str, Any]] = []
+        self._icon_index: Dict[str, Any] = {}
+        # Compatibility index: ABI/feature name -> bit, and per app its packages as
+        # (version_code, min_sdk, target_sdk, abi_mask, feature_mask, package position),
+        # newest first
+        self._abi_bits: Dict[str, int] = {}
+        self._feature_bits: Dict[str, int] = {}
+        self._compat_packages: List[List[Tuple[int, int, int, int, int, int]]] = []
+        # Sort permutations: field -> {'asc': positions, 'desc': positions, 'missing': positions}
+        self._sort_orders: Dict[str, Dict[str, List[int]]] = {}
+        # Similar-apps table, loaded in the background after the data;
+        # state is 'pending', 'ready' or 'unavailable'
+        self._similarity: Optional['SimilarityTable'] = None
+        self._similarity_state = 'pending'
         self.load_data()
     
     def load_data(self) -> None:
         """
-        Load application data from JSON file.
+        Load application data from the sharded layout if present,
+        otherwise from the single JSON file.
         
         Raises:
-            FileNotFoundError: If data file doesn't exist
-            JSONDecodeError: If data file is not valid JSON
+            FileNotFoundError: If neither layout exists
+            JSONDecodeError: If a data file is not valid JSON
+            ValueError: If a shard does not match its content hash
         """
         try:
-            if not os.path.exists(self.data_file):
+            shard_root = os.path.join(os.path.dirname(self.data_file), Config.SHARD_ROOT)
+            sharded = os.path.exists(shard_root)
+            source_file = shard_root if sharded else self.data_file
+            
+            if not os.path.exists(source_file):
                 logger.error(f"Data file not found: {self.data_file}")
                 raise FileNotFoundError(f"Data file not found: {self.data_file}")
             
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            timings: Dict[str, Any] = {'layout': 'sharded' if sharded else 'single'}
+            
+            start = time.perf_counter()
+            with open(source_file, 'rb') as f:
+                raw = f.read()
+            timings['file_read_ms'] = elapsed_ms(start)
+            
+            start = time.perf_counter()
+            data = json.loads(raw)
+            del raw
+            timings['json_decode_ms'] = elapsed_ms(start)
             
+            start = time.perf_counter()
+            self._icon_index = self._read_icon_index()
+            timings['icon_index_ms'] = elapsed_ms(start)
+            
+            if sharded:
+                start = time.perf_counter()
+                data['apps'] = self._read_shards(os.path.dirname(shard_root), data)
+                timings['shards_ms'] = elapsed_ms(start)
+            
+            start = time.perf_counter()
             self._apps = data.get('apps', [])
+            self._repositories = data.get('repositories') or []
+            timings['indexes_ms'] = self._build_indexes()
+            timings['index_build_ms'] = elapsed_ms(start)
+            self._load_timings = timings
+            
             self._metadata = {
                 'last_updated': data.get('last_updated'),
                 'apps_count': len(self._apps),
                 'loaded_at': datetime.utcnow().isoformat() + 'Z'
             }
             self._last_loaded = time.time()
+            self._load_count += 1
+            # The updater embeds a content checksum in the data file (and shard
+            # root), which keeps the version stable across reloads of unchanged
+            # data; older files fall back to a per-load counter
+            self._version = data.get('checksum') or f'load-{self._load_count}'
+            self._metadata['dataset_version'] = self._version
+            self.source_file = source_file
             
-            logger.info(f"Successfully loaded {len(self._apps)} apps from {self.data_file}")
+            logger.info(f"Successfully loaded {len(self._apps)} apps from {source_file}")
             
         except FileNotFoundError as e:
             logger.error(f"Data file not found: {e}")
@@ -118,6 +276,236 @@ class DataStore:
             logger.error(f"Unexpected error loading data: {e}")
             raise
     
+    def _build_indexes(self) -> Dict[str, float]:
+        """
+        Build per-snapshot lookup indexes over the loaded applications.
+        
+        Returns:
+            Build time in milliseconds for each index
+        """
+        timings: Dict[str, float] = {}
+        
+        start = time.perf_counter()
+        id_index: Dict[str, int] = {}
+        for pos, app in enumerate(self._apps):
+            id_index.setdefault(app.get('id'), pos)
+        self._id_index = id_index
+        self._similarity = None
+        self._similarity_state = 'pending'
+        timings['id'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._build_repository_index()
+        timings['repositories'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._permission_index = self._build_package_index('permissions')
+        timings['permissions'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._feature_index = self._build_package_index('features')
+        timings['features'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._build_apk_indexes()
+        timings['apk'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._build_prefix_indexes()
+        timings['prefix'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._build_sort_orders()
+        timings['sort'] = elapsed_ms(start)
+        
+        start = time.perf_counter()
+        self._build_compatibility_index()
+        timings['compatibility'] = elapsed_ms(start)
+        
+        return timings
+    
+    @staticmethod
+    def _sort_values(app: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extract typed sort keys for an application, parsing numeric fields once.
+        
+        Args:
+            app: Application dictionary
+            
+        Returns:
+            Mapping of sort field to comparable value (None when missing)
+        """
+        packages = app.get('packages') or []
+        latest = packages[0] if packages else {}
+        
+        return {
+            'name': normalize_text(app.get('name') or '') or None,
+            'added': app.get('added') or None,
+            'last_updated': app.get('last_updated') or None,
+            'size': parse_int(latest.get('size') or app.get('apk_size')),
+            'min_sdk': parse_int(latest.get('min_sdk')),
+            'target_sdk': parse_int(latest.get('target_sdk'))
+        }
+    
+    def _build_compatibility_index(self) -> None:
+        """
+        Precompute numeric SDK levels and ABI/feature bitmasks for every package,
+        so compatibility checks are integer comparisons.
+        """
+        abi_bits: Dict[str, int] = {}
+        feature_bits: Dict[str, int] = {}
+        compat_packages: List[List[Tuple[int, int, int, int, int, int]]] = []
+        
+        def mask(values: List[str], bits: Dict[str, int]) -> int:
+            # Older data files kept index.xml's comma-joined lists as one value
+            mask_value = 0
+            for value in values or []:
+                for name in value.split(','):
+                    name = name.strip()
+                    if not name:
+                        continue
+                    if name not in bits:
+                        bits[name] = 1 << len(bits)
+                    mask_value |= bits[name]
+            return mask_value
+        
+        for app in self._apps:
+            entries = []
+            for pkg_pos, pkg in enumerate(app.get('packages') or []):
+                version_code = parse_int(pkg.get('version_code'))
+                entries.append((
+                    version_code if version_code is not None else -1,
+                    parse_int(pkg.get('min_sdk')) or 1,
+                    parse_int(pkg.get('target_sdk')) or 0,
+                    mask(pkg.get('nativecode'), abi_bits),
+                    mask(pkg.get('features'), feature_bits),
+                    pkg_pos
+                ))
+            # Newest first; ties keep the repository's own order
+            entries.sort(key=lambda e: (-e[0], e[5]))
+            compat_packages.append(entries)
+        
+        self._abi_bits = abi_bits
+        self._feature_bits = feature_bits
+        self._compat_packages = compat_packages
+    
+    def _build_sort_orders(self) -> None:
+        """Precompute ascending and descending app permutations for every sort field."""
+        values = [self._sort_values(app) for app in self._apps]
+        sort_orders: Dict[str, Dict[str, List[int]]] = {}
+        
+        for field in Config.SORT_FIELDS:
+            present = [pos for pos, v in enumerate(values) if v[field] is not None]
+            key = lambda pos: values[pos][field]
+            sort_orders[field] = {
+                # Separate stable sorts keep ties in original order both ways
+                'asc': sorted(present, key=key),
+                'desc': sorted(present, key=key, reverse=True),
+                'missing': [pos for pos, v in enumerate(values) if v[field] is None]
+            }
+        
+        self._sort_orders = sort_orders
+    
+    def _build_prefix_indexes(self) -> None:
+        """Build sorted prefix arrays over normalized names and ids for suggestions."""
+        primary: List[Tuple[str, int]] = []
+        secondary: List[Tuple[str, int]] = []
+        suggestions: List[Dict[str, Any]] = []
+        
+        for pos, app in enumerate(self._apps):
+            name = normalize_text(app.get('name') or '')
+            app_id = (app.get('id') or '').lower()
+            suggestions.append({
+                'id': app.get('id'),
+                'name': app.get('name'),
+                'icon': app.get('icon')
+            })
+            
+            for key in {name, app_id}:
+                if key:
+                    primary.append((key, pos))
+            
+            words = set(_WORD_SPLIT.split(name)) | set(app_id.split('.')[1:])
+            words.discard('')
+            words.discard(name)
+            for word in words:
+                secondary.append((word, pos))
+        
+        primary.sort()
+        secondary.sort()
+        self._prefix_keys = [[k for k, _ in primary], [k for k, _ in secondary]]
+        self._prefix_positions = [[p for _, p in primary], [p for _, p in secondary]]
+        self._suggestions = suggestions
+    
+    def _build_repository_index(self) -> None:
+        """Count apps per source repository, keeping the configured priority order."""
+        counts: Dict[str, int] = {}
+        for app in self._apps:
+            repo = get_app_repo(app)
+            counts[repo] = counts.get(repo, 0) + 1
+        
+        repositories = []
+        for repo in self._repositories:
+            name = repo.get('name')
+            if name:
+                repositories.append({
+                    'name': name,
+                    'url': repo.get('url'),
+                    'count': counts.pop(name, 0)
+                })
+        for name, count in counts.items():
+            repositories.append({'name': name, 'url': None, 'count': count})
+        
+        self._repositories = repositories
+    
+    def _build_apk_indexes(self) -> None:
+        """Build hash and file name indexes over every published package."""
+        hash_index: Dict[str, Tuple[int, int]] = {}
+        apk_name_index: Dict[str, Tuple[int, int]] = {}
+        
+        for pos, app in enumerate(self._apps):
+            for pkg_pos, pkg in enumerate(app.get('packages') or []):
+                apk_hash = pkg.get('hash')
+                if apk_hash:
+                    hash_index.setdefault(apk_hash.lower(), (pos, pkg_pos))
+                
+                apk_name = pkg.get('apk_name')
+                if apk_name:
+                    apk_name_index.setdefault(apk_name, (pos, pkg_pos))
+        
+        self._hash_index = hash_index
+        self._apk_name_index = apk_name_index
+    
+    def _build_package_index(self, field: str) -> Dict[str, Dict[str, List[int]]]:
+        """
+        Build a reverse index from a package list field to application positions.
+        
+        Args:
+            field: Package field holding a list of names (e.g. 'permissions')
+            
+        Returns:
+            Dictionary with 'latest' (first package only) and 'any' (all packages)
+            mappings from name to sorted application positions
+        """
+        latest: Dict[str, List[int]] = {}
+        any_pkg: Dict[str, List[int]] = {}
+        
+        for pos, app in enumerate(self._apps):
+            packages = app.get('packages') or []
+            if not packages:
+                continue
+            
+            for name in set(packages[0].get(field) or []):
+                latest.setdefault(name, []).append(pos)
+            
+            names = set()
+            for pkg in packages:
+                names.update(pkg.get(field) or [])
+            for name in names:
+                any_pkg.setdefault(name, []).append(pos)
+        
+        return {'latest': latest, 'any': any_pkg}
+    
     def get_all_apps(self) -> List[Dict[str, Any]]:
         """Get all applications."""
         return self._apps
@@ -126,6 +514,128 @@ class DataStore:
         """Get metadata about the data store."""
         return self._metadata
     
+    def get_repositories(self) -> List[Dict[str, Any]]:
+        """Get source repositories in priority order with application counts."""
+        return self._repositories
+    
+    def has_repository(self, name: str) -> bool:
+        """Check whether any loaded application comes from a repository."""
+        return any(repo['name'] == name for repo in self._repositories)
+    
+    def get_index_objects(self) -> Dict[str, Any]:
+        """Get the per-snapshot index structures by name, for memory introspection."""
+        return {
+            'id': self._id_index,
+            'permissions': self._permission_index,
+            'features': self._feature_index,
+            'apk_hash': self._hash_index,
+            'apk_name': self._apk_name_index,
+            'prefix': (self._prefix_keys, self._prefix_positions),
+            'suggestions': self._suggestions,
+            'sort': self._sort_orders,
+            'repositories': self._repositories,
+            'similarity': self._similarity
+        }
+    
+    def get_load_timings(self) -> Dict[str, Any]:
+        """Get phase timings of the most recent load."""
+        return self._load_timings
+    
+    @staticmethod
+    def _read_shard(path: str, expected_sha256: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Read one content-addressed shard, verifying it when a hash is given.
+        
+        Args:
+            path: Shard file path
+            expected_sha256: Hash recorded in the shard root, or None to skip
+                verification
+            
+        Returns:
+            Applications stored in the shard
+            
+        Raises:
+            ValueError: If the content does not match the recorded hash
+        """
+        with open(path, 'rb') as f:
+            raw = f.read()
+        
+        if expected_sha256 is not None and hashlib.sha256(raw).hexdigest() != expected_sha256:
+            raise ValueError(f"Shard {path} does not match its content hash")
+        
+        return json.loads(raw).get('apps', [])
+    
+    def _read_shards(self, shards_dir: str, root: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Read every shard listed in a shard root, in parallel, and restore app order.
+        File reads and hashing release the GIL, so threads overlap them. Shards
+        are checked against their hashes only when Config.VERIFY_SHARDS is set.
+        
+        Args:
+            shards_dir: Directory holding the shard files
+            root: Parsed shard root
+            
+        Returns:
+            Applications in the order recorded by the root
+        """
+        shards = root.get('shards') or []
+        
+        with ThreadPoolExecutor(max_workers=Config.SHARD_LOAD_WORKERS) as pool:
+            parts = list(pool.map(
+                lambda shard: self._read_shard(
+                    os.path.join(shards_dir, os.path.basename(shard['file'])),
+                    shard['sha256'] if Config.VERIFY_SHARDS else None
+                ),
+                shards
+            ))
+        
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for apps in parts:
+            for app in apps:
+                by_id[app.get('id')] = app
+        
+        ordered = [by_id.pop(app_id) for app_id in root.get('order', []) if app_id in by_id]
+        # Apps missing from the recorded order keep a deterministic position
+        ordered.extend(by_id[app_id] for app_id in sorted(by_id, key=str))
+        return ordered
+    
+    def _read_icon_index(self) -> Dict[str, Any]:
+        """
+        Load the icon mirror index written by the updater.
+        
+        Returns:
+            Mapping of app id to icon entry, empty if icons are not mirrored
+        """
+        icon_index_file = os.path.join(Config.ICONS_DIR, Config.ICON_INDEX_NAME)
+        
+        try:
+            with open(icon_index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable icon index {icon_index_file}: {e}")
+            return {}
+    
+    def get_icon_hash(self, app_id: str, size: int, fmt: str) -> Optional[str]:
+        """
+        Get the content hash of a mirrored thumbnail.
+        
+        Args:
+            app_id: Application identifier
+            size: Thumbnail edge length in pixels
+            fmt: Image format ('png' or 'webp')
+            
+        Returns:
+            SHA-256 of the thumbnail, or None if it is not mirrored
+        """
+        entry = self._icon_index.get(app_id) or {}
+        return ((entry.get('thumbnails') or {}).get(str(size)) or {}).get(fmt)
+    
+    def get_version(self) -> str:
+        """Get the dataset version: the data file's content checksum, or a per-load counter."""
+        return self._version
+    
     def find_app_by_id(self, app_id: str) -> Optional[Dict[str, Any]]:
         """
         Find an application by its ID.
@@ -136,7 +646,162 @@ class DataStore:
         Returns:
             Application data if found, None otherwise
         """
-        return next((app for app in self._apps if app.get('id') == app_id), None)
+        pos = self._id_index.get(app_id)
+        return self._apps[pos] if pos is not None else None
+    
+    def load_similarity_table(self) -> None:
+        """
+        Load the similar-apps table written by the updater.
+        The table is only used when it was computed from this snapshot,
+        i.e. its checksum matches the dataset version.
+        """
+        similar_file = os.path.join(os.path.dirname(self.data_file), Config.SIMILAR_NAME)
+        start = time.perf_counter()
+        
+        try:
+            with open(similar_file, 'rb') as f:
+                raw = f.read()
+            table = json.loads(raw)
+        except FileNotFoundError:
+            logger.warning(f"Similar apps unavailable: {similar_file} not found")
+            self._similarity_state = 'unavailable'
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Similar apps unavailable: cannot read {similar_file}: {e}")
+            self._similarity_state = 'unavailable'
+            return
+        
+        if table.get('checksum') != self._version:
+            logger.warning(f"Similar apps unavailable: {similar_file} does not match the loaded data")
+            self._similarity_state = 'unavailable'
+            return
+        
+        try:
+            self._similarity = SimilarityTable(table, self._id_index, len(raw), elapsed_ms(start))
+        except (KeyError, TypeError, IndexError) as e:
+            logger.warning(f"Similar apps unavailable: malformed {similar_file}: {e}")
+            self._similarity_state = 'unavailable'
+            return
+        self._similarity_state = 'ready'
+    
+    def get_similarity_state(self) -> str:
+        """Get 'pending', 'ready' or 'unavailable' for the similar-apps table."""
+        return self._similarity_state
+    
+    def sort_apps(
+        self,
+        apps: List[Dict[str, Any]],
+        field: str,
+        descending: bool = False,
+        include_missing: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Order applications by a precomputed permutation instead of sorting.
+        
+        Args:
+            apps: Applications to order (the full snapshot or any subset of it)
+            field: One of Config.SORT_FIELDS
+            descending: Sort direction
+            include_missing: Whether to append apps lacking the field at the end
+            
+        Returns:
+            Ordered list of applications
+        """
+        orders = self._sort_orders[field]
+        permutation = orders['desc' if descending else 'asc']
+        if include_missing:
+            permutation = permutation + orders['missing']
+        
+        if apps is self._apps:
+            return [self._apps[pos] for pos in permutation]
+        
+        # Subsets walk the permutation and keep their members: O(n), no comparisons
+        wanted = {self._id_index.get(app.get('id')) for app in apps}
+        return [self._apps[pos] for pos in permutation if pos in wanted]
+    
+    def get_compatible_apps(
+        self,
+        sdk: int,
+        abis: Optional[List[str]] = None,
+        features: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get applications installable on a device, each with its newest matching package.
+        
+        A package matches when its min_sdk is at most the device SDK level, it has
+        no native code or shares an ABI with the device, and every feature it uses
+        is available. ABI and feature checks are skipped when not given.
+        
+        Args:
+            sdk: Device API level
+            abis: Supported ABIs (e.g. arm64-v8a), or None to skip the check
+            features: Available features, or None to skip the check
+            
+        Returns:
+            List of {id, name, icon, package} dictionaries in snapshot order
+        """
+        device_abis = 0
+        for abi in abis or []:
+            device_abis |= self._abi_bits.get(abi, 0)
+        
+        device_features = 0
+        for feature in features or []:
+            device_features |= self._feature_bits.get(feature, 0)
+        missing_features = ~device_features
+        
+        min_target_sdk = 0
+        for device_sdk, target_sdk in Config.MIN_TARGET_SDK_BY_DEVICE_SDK:
+            if sdk >= device_sdk:
+                min_target_sdk = max(min_target_sdk, target_sdk)
+        
+        check_abis = abis is not None
+        check_features = features is not None
+        results = []
+        
+        for pos, entries in enumerate(self._compat_packages):
+            for _, min_sdk, target_sdk, abi_mask, feature_mask, pkg_pos in entries:
+                if min_sdk > sdk:
+                    continue
+                if target_sdk and target_sdk < min_target_sdk:
+                    continue
+                if check_abis and abi_mask and not abi_mask & device_abis:
+                    continue
+                if check_features and feature_mask & missing_features:
+                    continue
+                
+                results.append({
+                    **self._suggestions[pos],
+                    'package': self._apps[pos]['packages'][pkg_pos]
+                })
+                break
+        
+        return results
+    
+    def get_similarity_stats(self) -> Optional[Dict[str, Any]]:
+        """Get size and load cost of the similar-apps table, None if not loaded."""
+        similarity = self._similarity
+        return similarity.stats() if similarity is not None else None
+    
+    def get_similar_apps(self, app_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get applications most similar to a given application.
+        Only valid once the similar-apps table is loaded.
+        
+        Args:
+            app_id: Application identifier
+            limit: Maximum number of similar applications
+            
+        Returns:
+            List of {id, name, icon, score} dictionaries, or None if the app is unknown
+        """
+        pos = self._id_index.get(app_id)
+        if pos is None:
+            return None
+        
+        return [
+            {**self._suggestions[neighbor], 'score': score}
+            for neighbor, score in self._similarity.neighbors(pos, limit)
+        ]
     
     def search_apps(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -181,6 +846,151 @@ class DataStore:
             if category in app.get('categories', [])
         ]
     
+    def _lookup_package_index(
+        self,
+        index: Dict[str, Dict[str, List[int]]],
+        name: str,
+        scope: str,
+        prefix: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Resolve a name in a reverse package index to applications.
+        
+        Args:
+            index: Reverse index built by _build_package_index
+            name: Name to look up
+            scope: 'latest' or 'any'
+            prefix: Optional namespace tried when the bare name is unknown
+            
+        Returns:
+            List of matching applications, or None if the name is unknown
+        """
+        names = index['any']
+        if name not in names and prefix and not name.startswith(prefix):
+            name = prefix + name
+        if name not in names:
+            return None
+        
+        return [self._apps[pos] for pos in index[scope].get(name, [])]
+    
+    def get_apps_by_permission(self, permission: str, scope: str = 'latest') -> Optional[List[Dict[str, Any]]]:
+        """
+        Get applications requesting a permission.
+        Short names like READ_CONTACTS resolve to android.permission.READ_CONTACTS.
+        
+        Args:
+            permission: Permission name
+            scope: 'latest' to check the newest package only, 'any' for all packages
+            
+        Returns:
+            List of applications, or None if no package requests the permission
+        """
+        return self._lookup_package_index(
+            self._permission_index, permission, scope, 'android.permission.'
+        )
+    
+    def get_apps_by_feature(self, feature: str, scope: str = 'latest') -> Optional[List[Dict[str, Any]]]:
+        """
+        Get applications requiring a hardware/software feature.
+        
+        Args:
+            feature: Feature name (e.g. android.hardware.camera)
+            scope: 'latest' to check the newest package only, 'any' for all packages
+            
+        Returns:
+            List of applications, or None if no package uses the feature
+        """
+        return self._lookup_package_index(self._feature_index, feature, scope)
+    
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get lightweight suggestions for names or ids starting with a prefix.
+        Whole-name and id matches rank ahead of word matches.
+        
+        Args:
+            prefix: Typed prefix (case- and accent-insensitive)
+            limit: Maximum number of suggestions
+            
+        Returns:
+            List of {id, name, icon} dictionaries
+        """
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        
+        for keys, positions in zip(self._prefix_keys, self._prefix_positions):
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix):
+                pos = positions[i]
+                if pos not in seen:
+                    seen.add(pos)
+                    results.append(self._suggestions[pos])
+                    if len(results) >= limit:
+                        return results
+                i += 1
+        
+        return results
+    
+    def _resolve_apk(self, location: Optional[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+        """Turn an APK index entry into an app/package match."""
+        if location is None:
+            return None
+        
+        pos, pkg_pos = location
+        app = self._apps[pos]
+        
+        return {
+            'app_id': app.get('id'),
+            'name': app.get('name'),
+            'icon': app.get('icon'),
+            'package': app['packages'][pkg_pos]
+        }
+    
+    def find_apk_by_hash(self, apk_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the application and package for an APK hash.
+        
+        Args:
+            apk_hash: Hex-encoded APK hash (case-insensitive)
+            
+        Returns:
+            Match with app_id, name, icon and package, or None if unknown
+        """
+        return self._resolve_apk(self._hash_index.get(apk_hash.strip().lower()))
+    
+    def find_apk_by_name(self, apk_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the application and package for an APK file name.
+        
+        Args:
+            apk_name: APK file name as published in the repository
+            
+        Returns:
+            Match with app_id, name, icon and package, or None if unknown
+        """
+        return self._resolve_apk(self._apk_name_index.get(apk_name.strip()))
+    
+    def _count_package_index(self, index: Dict[str, Dict[str, List[int]]], scope: str) -> List[Dict[str, Any]]:
+        """Get names in a reverse package index with app counts, most common first."""
+        return [
+            {'name': name, 'count': len(positions)}
+            for name, positions in sorted(
+                index[scope].items(),
+                key=lambda x: (-len(x[1]), x[0])
+            )
+        ]
+    
+    def get_all_permissions(self, scope: str = 'latest') -> List[Dict[str, Any]]:
+        """Get all permissions with application counts."""
+        return self._count_package_index(self._permission_index, scope)
+    
+    def get_all_features(self, scope: str = 'latest') -> List[Dict[str, Any]]:
+        """Get all features with application counts."""
+        return self._count_package_index(self._feature_index, scope)
+    
     def get_all_categories(self) -> List[Dict[str, Any]]:
         """
         Get all categories with application counts.
@@ -205,494 +1015,2238 @@ class DataStore:
         ]
 
 
-# Initialize data store
-try:
-    data_store = DataStore(Config.DATA_FILE)
-except Exception as e:
-    logger.critical(f"Failed to initialize data store: {e}")
-    # Create empty data store to prevent crashes
-    data_store = None
-
-
-# =============================================================================
-# UTILITY FUNCTIONS
-# =============================================================================
-
-def is_game(app: Dict[str, Any]) -> bool:
+def parse_int(value: Any) -> Optional[int]:
     """
-    Determine if an application is a game based on its categories.
+    Parse an integer stored as a string by the updater.
     
     Args:
-        app: Application dictionary
+        value: Raw value
         
     Returns:
-        True if application is a game, False otherwise
+        Integer value, or None if missing or malformed
     """
-    game_categories = {'Games', 'Game'}
-    return any(cat in game_categories for cat in app.get('categories', []))
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
-def timing_decorator(f):
+def elapsed_ms(start: float) -> float:
     """
-    Decorator to measure and add response time to API responses.
+    Milliseconds elapsed since a time.perf_counter() reading.
     
     Args:
-        f: Function to decorate
+        start: Start reading from time.perf_counter()
         
     Returns:
-        Wrapped function with timing measurement
+        Elapsed time in milliseconds
     """
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = f(*args, **kwargs)
-        elapsed_ms = round((time.time() - start_time) * 1000, 2)
-        
-        # Add timing to response
-        if isinstance(result, tuple):
-            data, status = result
-            if isinstance(data, dict):
-                data['_response_time_ms'] = elapsed_ms
-            return data, status
-        
-        return result
-    
-    return wrapper
+    return round((time.perf_counter() - start) * 1000, 3)
 
 
-def create_error_response(
-    message: str, 
-    status_code: int = 400,
-    error_code: Optional[str] = None
-) -> Tuple[Dict[str, Any], int]:
+_WORD_SPLIT = re.compile(r'[^\w]+')
+
+
+def normalize_text(text: str) -> str:
     """
-    Create a standardized error response.
+    Normalize text for prefix matching: strip accents, casefold, trim.
     
     Args:
-        message: Error message
-        status_code: HTTP status code
-        error_code: Optional error code for programmatic handling
+        text: Raw text
         
     Returns:
-        Tuple of (response_dict, status_code)
+        Normalized text
     """
-    response = {
-        'success': False,
-        'error': {
-            'message': message,
-            'code': error_code or f'ERROR_{status_code}',
-            'status': status_code
-        },
-        'timestamp': datetime.utcnow().isoformat() + 'Z'
-    }
-    return response, status_code
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold().strip()
 
 
-def create_success_response(
-    data: Any,
-    message: Optional[str] = None,
-    **kwargs
-) -> Dict[str, Any]:
+# =============================================================================
+# SIMILARITY INDEX
+# =============================================================================
+
+class SimilarityTable:
     """
-    Create a standardized success response.
+    Similar-apps lookup table for one data snapshot.
+    
+    The updater computes the top TF-IDF cosine neighbors of every app once per
+    snapshot and stores them in data/similar.json as rows of neighbor row
+    numbers and scores; serving a request is a list slice.
+    """
+    
+    def __init__(
+        self,
+        table: Dict[str, Any],
+        id_index: Dict[str, int],
+        file_bytes: int,
+        load_ms: float
+    ):
+        """
+        Map the table's rows onto snapshot positions.
+        
+        Args:
+            table: Decoded similar.json
+            id_index: Snapshot app id -> position
+            file_bytes: Size of the table file
+            load_ms: Time spent reading and decoding the file
+        """
+        self._positions: List[Optional[int]] = [id_index.get(app_id) for app_id in table['ids']]
+        self._rows: Dict[int, int] = {
+            pos: row for row, pos in enumerate(self._positions) if pos is not None
+        }
+        self._neighbors: List[List[int]] = table['neighbors']
+        self._scores: List[List[float]] = table['scores']
+        self._stats = {
+            'apps': len(self._rows),
+            'vocabulary_size': table.get('vocabulary_size'),
+            'top_k': table.get('top_k'),
+            'build_ms': table.get('build_ms'),
+            'load_ms': load_ms,
+            'file_bytes': file_bytes,
+            'loaded_at': datetime.utcnow().isoformat() + 'Z'
+        }
+    
+    def neighbors(self, pos: int, limit: int) -> List[Tuple[int, float]]:
+        """
+        Get the nearest neighbors of an application.
+        
+        Args:
+            pos: Application position in the snapshot
+            limit: Maximum number of neighbors
+            
+        Returns:
+            List of (position, cosine score) pairs, most similar first
+        """
+        row = self._rows.get(pos)
+        if row is None:
+            return []
+        
+        result = []
+        for neighbor, score in zip(self._neighbors[row], self._scores[row]):
+            neighbor_pos = self._positions[neighbor]
+            if neighbor_pos is not None:
+                result.append((neighbor_pos, score))
+                if len(result) == limit:
+                    break
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get size and load cost of the table."""
+        return self._stats
+
+
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+class ResponseCache:
+    """
+    Thread-safe bounded LRU/TTL cache for serialized response bodies.
+    Bounded both by entry count and by total body bytes; bodies larger than
+    the per-entry cap are not cached. Entries are tied to a dataset version
+    and dropped when the data reloads.
+    """
+    
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int, max_entry_bytes: int):
+        """
+        Initialize the response cache.
+        
+        Args:
+            max_entries: Maximum number of cached responses (0 disables caching)
+            ttl: Lifetime of a cached response in seconds
+            max_bytes: Maximum total size of cached bodies in bytes
+            max_entry_bytes: Largest body that is cached, in bytes
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries: 'OrderedDict[Tuple, Tuple[float, bytes]]' = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._oversized = 0
+    
+    def _check_version(self, version: Any) -> None:
+        """Drop all entries if the dataset version changed. Caller holds the lock."""
+        if version != self._version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+    
+    def _remove(self, key: Tuple) -> None:
+        """Remove one entry and account for its size. Caller holds the lock."""
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+        self._evictions += 1
+    
+    def get(self, key: Tuple, version: Any) -> Optional[bytes]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Normalized route and parameters
+            version: Current dataset version
+            
+        Returns:
+            Response body if cached and fresh, None otherwise
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            
+            if entry is None:
+                self._misses += 1
+                return None
+            
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return body
+    
+    def put(self, key: Tuple, version: Any, body: bytes) -> None:
+        """
+        Store a response body, evicting the least recently used entries
+        until both the entry and byte limits hold.
+        
+        Args:
+            key: Normalized route and parameters
+            version: Dataset version the body was built from
+            body: Serialized response body
+        """
+        if self.max_entries <= 0:
+            return
+        
+        with self._lock:
+            if len(body) > self.max_entry_bytes:
+                self._oversized += 1
+                return
+            
+            self._check_version(version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._bytes += len(body)
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_entry_bytes': self.max_entry_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'oversized': self._oversized,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+response_cache = ResponseCache(
+    Config.RESPONSE_CACHE_SIZE,
+    Config.RESPONSE_CACHE_TTL,
+    Config.RESPONSE_CACHE_BYTES,
+    Config.RESPONSE_CACHE_MAX_ENTRY_BYTES
+)
+
+
+# =============================================================================
+# ADMISSION CONTROL
+# =============================================================================
+
+class AdmissionController:
+    """
+    Per-process admission control for expensive requests.
+    
+    At most `max_concurrent` heavy requests run at once. Further heavy requests
+    wait in a bounded queue for up to `timeout` seconds and are shed when the
+    queue is full or the wait expires. Cheap requests never pass through here.
+    """
+    
+    def __init__(self, max_concurrent: int, max_queue: int, timeout: float):
+        """
+        Initialize the controller.
+        
+        Args:
+            max_concurrent: Maximum heavy requests in flight
+            max_queue: Maximum heavy requests waiting for a slot
+            timeout: Maximum seconds a request waits in the queue
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._admitted = 0
+        self._queued = 0
+        self._shed_queue_full = 0
+        self._shed_timeout = 0
+    
+    def acquire(self) -> bool:
+        """
+        Claim a heavy-request slot, waiting in the queue if necessary.
+        
+        Returns:
+            True if admitted (the caller must release()), False if shed
+        """
+        with self._cond:
+            if self._active < self.max_concurrent:
+                self._active += 1
+                self._admitted += 1
+                return True
+            
+            if self._waiting >= self.max_queue:
+                self._shed_queue_full += 1
+                return False
+            
+            self._waiting += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+            deadline = time.monotonic() + self.timeout
+            
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._shed_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+                
+                self._active += 1
+                self._admitted += 1
+                self._queued += 1
+                return True
+            finally:
+                self._waiting -= 1
+    
+    def release(self) -> None:
+        """Return a heavy-request slot and wake one waiter."""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get concurrency, queue depth and shed counters."""
+        with self._cond:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_seconds': self.timeout,
+                'active': self._active,
+                'queue_depth': self._waiting,
+                'peak_queue_depth': self._peak_waiting,
+                'admitted': self._admitted,
+                'admitted_after_queueing': self._queued,
+                'shed': self._shed_queue_full + self._shed_timeout,
+                'shed_queue_full': self._shed_queue_full,
+                'shed_timeout': self._shed_timeout
+            }
+
+
+admission_controller = AdmissionController(
+    Config.MAX_CONCURRENT_HEAVY,
+    Config.MAX_HEAVY_QUEUE,
+    Config.HEAVY_QUEUE_TIMEOUT
+)
+
+
+def is_heavy_request() -> bool:
+    """
+    Classify the current request by cost.
+    Listing endpoints are heavy unless they paginate and the client asked for
+    a single page. Search and compatibility filtering scan the full catalog,
+    so they are heavy even when paginated.
+    
+    Returns:
+        True if the request must pass admission control
+    """
+    if request.endpoint not in Config.HEAVY_ENDPOINTS:
+        return False
+    if request.endpoint not in Config.PAGINATED_ENDPOINTS:
+        return True
+    return 'page' not in request.args and 'per_page' not in request.args
+
+
+def admit_heavy_request() -> Optional[Tuple[Dict[str, Any], int, Dict[str, str]]]:
+    """
+    Take an admission slot if the current request is heavy.
+    The slot is released once the response is closed (see after_request).
+    
+    Returns:
+        None if admitted or not heavy, otherwise a 503 SERVER_BUSY response
+    """
+    if not is_heavy_request():
+        return None
+    
+    if not admission_controller.acquire():
+        response, status = create_error_response(
+            'Server is busy - please retry shortly',
+            503,
+            'SERVER_BUSY'
+        )
+        return response, status, {'Retry-After': str(Config.RETRY_AFTER_SECONDS)}
+    
+    g.admission_slot = True
+    return None
+
+
+# =============================================================================
+# MEMORY INTROSPECTION
+# =============================================================================
+
+# tracemalloc is process-wide: a second trace would reset the first one's peak
+# and stop tracing under it, so only one trace runs at a time
+_trace_lock = threading.Lock()
+
+
+def deep_sizeof(obj: Any, seen: set) -> int:
+    """
+    Retained size of an object graph in bytes.
+    Objects already in `seen` are skipped, so sharing one set across calls
+    attributes every object to the first structure that reaches it.
     
     Args:
-        data: Response data
-        message: Optional success message
-        **kwargs: Additional fields to include in response
+        obj: Root object
+        seen: Ids of objects already counted (updated in place)
         
     Returns:
-        Response dictionary
+        Size in bytes of objects not previously seen
     """
-    response = {
-        'success': True,
-        'timestamp': datetime.utcnow().isoformat() + 'Z',
-        **kwargs
+    total = 0
+    stack = [obj]
+    
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__') and not isinstance(current, type):
+            stack.append(vars(current))
+    
+    return total
+
+
+def memory_report(store: DataStore) -> Dict[str, Any]:
+    """
+    Break down the retained size of a data store snapshot.
+    Application fields are measured first, then indexes, so index figures
+    only include memory not already held by the application records.
+    
+    Args:
+        store: Data store to measure
+        
+    Returns:
+        Sizes in bytes by app field, package field and index
+    """
+    start = time.perf_counter()
+    seen: set = set()
+    apps = store.get_all_apps()
+    
+    containers = sys.getsizeof(apps)
+    seen.add(id(apps))
+    
+    by_field: Dict[str, int] = {}
+    by_package_field: Dict[str, int] = {}
+    
+    for app in apps:
+        seen.add(id(app))
+        containers += sys.getsizeof(app)
+        
+        for field, value in app.items():
+            if field == 'packages' and isinstance(value, list):
+                seen.add(id(value))
+                size = sys.getsizeof(value)
+                for pkg in value:
+                    seen.add(id(pkg))
+                    size += sys.getsizeof(pkg)
+                    for pkg_field, pkg_value in pkg.items():
+                        pkg_size = deep_sizeof(pkg_field, seen) + deep_sizeof(pkg_value, seen)
+                        by_package_field[pkg_field] = by_package_field.get(pkg_field, 0) + pkg_size
+                by_field[field] = by_field.get(field, 0) + size
+            else:
+                size = deep_sizeof(field, seen) + deep_sizeof(value, seen)
+                by_field[field] = by_field.get(field, 0) + size
+    
+    by_field['packages'] = by_field.get('packages', 0) + sum(by_package_field.values())
+    apps_total = containers + sum(by_field.values())
+    
+    by_index = {
+        name: deep_sizeof(obj, seen)
+        for name, obj in store.get_index_objects().items()
     }
     
-    if message:
-        response['message'] = message
+    def ranked(sizes: Dict[str, int]) -> List[Dict[str, Any]]:
+        return [
+            {'name': name, 'bytes': size, 'share': round(size / apps_total, 4) if apps_total else 0.0}
+            for name, size in sorted(sizes.items(), key=lambda x: x[1], reverse=True)
+        ]
     
-    # Handle different data types
-    if isinstance(data, list):
-        response['data'] = data
-        response['count'] = len(data)
-    elif isinstance(data, dict):
-        response.update(data)
-    else:
-        response['data'] = data
+    return {
+        'apps': len(apps),
+        'total_bytes': apps_total + sum(by_index.values()),
+        'apps_bytes': apps_total,
+        'record_containers_bytes': containers,
+        'indexes_bytes': sum(by_index.values()),
+        'by_field': ranked(by_field),
+        'by_package_field': ranked(by_package_field),
+        'by_index': [
+            {'name': name, 'bytes': size}
+            for name, size in sorted(by_index.items(), key=lambda x: x[1], reverse=True)
+        ],
+        'measure_ms': elapsed_ms(start)
+    }
+
+
+def trace_load_allocations(data_file: str, top: int) -> Optional[Dict[str, Any]]:
+    """
+    Load a throwaway data store under tracemalloc.
+    The result reports peak memory during a reload and the top allocation
+    sites of load_data(); the live data store is not touched. Tracing
+    records every allocation in the process, so all threads run slower
+    until the trace finishes.
     
-    return response
+    Args:
+        data_file: Path to the JSON data file
+        top: Number of allocation sites to report
+        
+    Returns:
+        Peak/retained traced memory and top allocation sites, or None if
+        another trace is already running
+    """
+    if not _trace_lock.acquire(blocking=False):
+        return None
+    
+    try:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            store = DataStore(data_file)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        _trace_lock.release()
+    
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    
+    sites = [
+        {
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'bytes': stat.size,
+            'count': stat.count
+        }
+        for stat in snapshot.statistics('lineno')[:top]
+    ]
+    del store
+    
+    return {
+        'load_ms': elapsed_ms(start),
+        'retained_bytes': current - before,
+        'peak_bytes': peak - before,
+        'top_allocations': sites
+    }
+
+
+def get_max_rss_bytes() -> Optional[int]:
+    """Get the peak resident set size of the process, None where unsupported."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-POSIX platforms
+        return None
+    
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
 
 
 # =============================================================================
-# ERROR HANDLERS
+# STARTUP
 # =============================================================================
 
-@app.errorhandler(404)
-def not_found_error(error):
-    """Handle 404 errors."""
-    logger.warning(f"404 error: {request.url}")
-    return create_error_response(
-        'Endpoint not found',
-        404,
-        'ENDPOINT_NOT_FOUND'
-    )
+class StartupProfile:
+    """
+    Records wall-clock timings of cold-start phases, measured from the
+    first line of this module.
+    """
+    
+    def __init__(self, origin: float):
+        """
+        Initialize the profile.
+        
+        Args:
+            origin: time.perf_counter() reading taken at module import start
+        """
+        self.origin = origin
+        self._phases: Dict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def record(self, phase: str, value: Any) -> None:
+        """Record a phase timing (milliseconds) or nested breakdown."""
+        with self._lock:
+            self._phases[phase] = value
+    
+    def report(self) -> Dict[str, Any]:
+        """Get all recorded phases."""
+        with self._lock:
+            return dict(self._phases)
 
 
-@app.errorhandler(405)
-def method_not_allowed_error(error):
-    """Handle 405 errors."""
-    logger.warning(f"405 error: {request.method} {request.url}")
-    return create_error_response(
-        f'Method {request.method} not allowed for this endpoint',
-        405,
-        'METHOD_NOT_ALLOWED'
-    )
+startup_profile = StartupProfile(_IMPORT_START)
+startup_profile.record('imports_ms', round((_IMPORTS_DONE - _IMPORT_START) * 1000, 3))
+startup_profile.record('app_setup_ms', round((_APP_SETUP_DONE - _IMPORTS_DONE) * 1000, 3))
 
+# Set once initialization finished, whether or not it succeeded
+data_store_ready = threading.Event()
+data_store: Optional[DataStore] = None
 
-@app.errorhandler(500)
-def internal_server_error(error):
-    """Handle 500 errors."""
-    logger.error(f"500 error: {error}")
-    return create_error_response(
-        'Internal server error occurred',
-        500,
-        'INTERNAL_SERVER_ERROR'
-    )
 
+def initialize_data_store() -> None:
+    """
+    Build the global data store and record its startup timings.
+    Runs either inline at import or in a background loader thread.
+    """
+    global data_store
+    start = time.perf_counter()
+    
+    try:
+        store = DataStore(Config.DATA_FILE)
+        startup_profile.record('data_load', store.get_load_timings())
+        data_store = store
+    except Exception as e:
+        logger.critical(f"Failed to initialize data store: {e}")
+        # Leave the data store empty to prevent crashes
+        data_store = None
+    finally:
+        startup_profile.record('data_store_ms', elapsed_ms(start))
+        startup_profile.record('ready_since_import_ms', elapsed_ms(_IMPORT_START))
+        data_store_ready.set()
+        
+        if Config.PROFILE_STARTUP:
+            logger.info(f"Startup profile: {json.dumps(startup_profile.report())}")
+    
+    if data_store is not None:
+        threading.Thread(
+            target=load_similarity_table,
+            args=(data_store,),
+            name='droidx-similarity',
+            daemon=True
+        ).start()
+
+
+def load_similarity_table(store: 'DataStore') -> None:
+    """
+    Load the similar-apps table off the request path after the data is ready.
+    
+    Args:
+        store: Loaded data store
+    """
+    start = time.perf_counter()
+    store.load_similarity_table()
+    startup_profile.record('similarity_ms', elapsed_ms(start))
 
-@app.errorhandler(Exception)
-def handle_unexpected_error(error):
-    """Handle unexpected errors."""
-    logger.error(f"Unexpected error: {error}", exc_info=True)
-    return create_error_response(
-        'An unexpected error occurred',
-        500,
-        'UNEXPECTED_ERROR'
-    )
 
 
 # =============================================================================
-# MIDDLEWARE
+# UTILITY FUNCTIONS
 # =============================================================================
 
-@app.before_request
-def before_request():
-    """Execute before each request."""
-    # Log request
-    logger.info(f"{request.method} {request.path} from {request.remote_addr}")
+def is_game(app: Dict[str, Any]) -> bool:
+    """
+    Determine if an application is a game based on its categories.
     
-    # Check if data store is available
-    if data_store is None:
-        return create_error_response(
-            'Service temporarily unavailable - data not loaded',
-            503,
-            'DATA_NOT_AVAILABLE'
-        )
+    Args:
+        app: Application dictionary
+        
+    Returns:
+        True if application is a game, False otherwise
+    """
+    game_categories = {'Games', 'Game'}
+    return any(cat in game_categories for cat in app.get('categories', []))
+
+
+def get_app_repo(app: Dict[str, Any]) -> str:
+    """
+    Get the name of the repository an application was ingested from.
+    
+    Args:
+        app: Application dictionary
+        
+    Returns:
+        Repository name, Config.DEFAULT_REPO for unattributed records
+    """
+    return app.get('repo') or Config.DEFAULT_REPO
+
+
+def apply_repo_filter(
+    apps: List[Dict[str, Any]]
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    Restrict applications to the repository named by the 'repo' query parameter.
+    
+    Args:
+        apps: Applications to filter
+        
+    Returns:
+        Tuple of (filtered_apps, None) on success or (None, error_response)
+    """
+    repo = request.args.get('repo', '').strip()
+    
+    if not repo:
+        return apps, None
+    
+    if not data_store.has_repository(repo):
+        return None, create_error_response(
+            f'Repository "{repo}" not found',
+            404,
+            'REPO_NOT_FOUND'
+        )
+    
+    return [app for app in apps if get_app_repo(app) == repo], None
+
+
+def parse_fields() -> Optional[List[str]]:
+    """
+    Parse the comma-separated 'fields' projection query parameter.
+    
+    Returns:
+        List of field names, or None to keep every field
+    """
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    return fields or None
+
+
+def project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Keep only the requested fields of a record.
+    
+    Args:
+        record: Application or package dictionary
+        fields: Field names to keep, or None for all fields
+        
+    Returns:
+        Projected record
+    """
+    if fields is None:
+        return record
+    return {field: record.get(field) for field in fields}
+
+
+def iter_package_rows(apps: List[Dict[str, Any]]):
+    """
+    Flatten applications into one row per published package.
+    
+    Args:
+        apps: Applications to flatten
+        
+    Yields:
+        Package dictionaries extended with app_id, repo and is_latest
+    """
+    for app in apps:
+        for pkg_pos, pkg in enumerate(app.get('packages') or []):
+            yield {
+                'app_id': app.get('id'),
+                'repo': get_app_repo(app),
+                'is_latest': pkg_pos == 0,
+                **pkg
+            }
+
+
+def stream_ndjson(records, compress: bool):
+    """
+    Serialize records as newline-delimited JSON in bounded chunks.
+    
+    Args:
+        records: Iterable of dictionaries, consumed lazily
+        compress: Whether to gzip the stream
+        
+    Yields:
+        Encoded chunks of at most roughly Config.EXPORT_CHUNK_SIZE bytes
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer: List[bytes] = []
+    buffered = 0
+    
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        buffer.append(line)
+        buffered += len(line)
+        
+        if buffered >= Config.EXPORT_CHUNK_SIZE:
+            chunk = b''.join(buffer)
+            buffer, buffered = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def timing_decorator(f):
+    """
+    Decorator to measure and add response time to API responses.
+    
+    Args:
+        f: Function to decorate
+        
+    Returns:
+        Wrapped function with timing measurement
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        start_time = time.time()
+        result = f(*args, **kwargs)
+        elapsed_ms = round((time.time() - start_time) * 1000, 2)
+        
+        # Add timing to response
+        if isinstance(result, tuple):
+            data = result[0]
+            if isinstance(data, dict):
+                data['_response_time_ms'] = elapsed_ms
+            return result
+        
+        return result
+    
+    return wrapper
+
+
+def cached_response(*params: str):
+    """
+    Decorator to memoize finished response bodies in the response cache.
+    The key is the route plus the normalized values of the listed query
+    parameters, the only ones the view reads, so unrelated parameters such as
+    cache busters share an entry. Entries are scoped to the current dataset
+    version. Only successful responses are cached, stored without their
+    volatile fields, which are stamped afresh on every reply. Heavy requests
+    take an admission slot only on a miss, so hits are never shed.
+    
+    Args:
+        *params: Query parameters that affect the response
+        
+    Returns:
+        Decorator wrapping a view to serve cached bodies when available
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if data_store is None:
+                return f(*args, **kwargs)
+            
+            start_time = time.time()
+            values = []
+            for name in params:
+                # Views read the first value only, trimmed
+                value = request.args.get(name)
+                if value is not None:
+                    value = value.strip()
+                    if name in Config.CASE_INSENSITIVE_PARAMS:
+                        value = value.lower()
+                    values.append((name, value))
+            key = (request.path, tuple(values))
+            version = data_store.get_version()
+            
+            body = response_cache.get(key, version)
+            cache_status = 'HIT'
+            
+            if body is None:
+                shed = admit_heavy_request()
+                if shed is not None:
+                    return app.make_response(shed)
+                
+                result = f(*args, **kwargs)
+                # Errors come back as (body, status) tuples and are never cached
+                if not isinstance(result, dict):
+                    response = app.make_response(result)
+                    response.headers['X-Cache'] = 'MISS'
+                    return response
+                
+                stable = {
+                    name: value for name, value in result.items()
+                    if name not in Config.VOLATILE_RESPONSE_FIELDS
+                }
+                body = app.json.dumps(stable).encode('utf-8')
+                response_cache.put(key, version, body)
+                cache_status = 'MISS'
+            
+            # Splice fresh volatile fields in front of the cached object's members
+            stamp = json.dumps({
+                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                '_response_time_ms': round((time.time() - start_time) * 1000, 2)
+            })
+            response = Response(
+                stamp[:-1].encode('utf-8') + b',' + body[1:],
+                mimetype='application/json'
+            )
+            response.headers['X-Cache'] = cache_status
+            return response
+        
+        wrapper.response_cached = True
+        return wrapper
+    
+    return decorator
+
+
+def parse_pagination() -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    Parse and validate the 'page' and 'per_page' query parameters.
+    
+    Returns:
+        Tuple of ((page, per_page), None) on success or (None, error_response)
+    """
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', Config.DEFAULT_PAGE_SIZE, type=int)
+    
+    if page < 1:
+        return None, create_error_response(
+            'Page must be a positive integer',
+            400,
+            'INVALID_PAGE'
+        )
+    
+    if per_page < 1 or per_page > Config.MAX_PAGE_SIZE:
+        return None, create_error_response(
+            f'per_page must be between 1 and {Config.MAX_PAGE_SIZE}',
+            400,
+            'INVALID_PAGE_SIZE'
+        )
+    
+    return (page, per_page), None
+
+
+def paginate(items: List[Any], page: int, per_page: int) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Slice a list into a single page.
+    
+    Args:
+        items: Full result list
+        page: 1-based page number
+        per_page: Items per page
+        
+    Returns:
+        Tuple of (page_items, pagination_info)
+    """
+    total = len(items)
+    start = (page - 1) * per_page
+    
+    return items[start:start + per_page], {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'total_pages': (total + per_page - 1) // per_page
+    }
+
+
+def apply_sort_and_pagination(
+    apps: List[Dict[str, Any]]
+) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    Apply the optional 'sort'/'order' and 'page'/'per_page' query parameters.
+    Sorting uses the data store's precomputed permutations; pagination is only
+    applied when 'page' or 'per_page' is given so unpaged responses are unchanged.
+    
+    Args:
+        apps: Filtered applications
+        
+    Returns:
+        Tuple of (apps, extra_response_fields, None) on success or
+        (None, {}, error_response)
+    """
+    extra: Dict[str, Any] = {}
+    sort = request.args.get('sort', '').strip().lower()
+    
+    if sort:
+        if sort not in Config.SORT_FIELDS:
+            return None, {}, create_error_response(
+                f'Sort must be one of: {", ".join(Config.SORT_FIELDS)}',
+                400,
+                'INVALID_SORT'
+            )
+        
+        order = request.args.get('order', 'asc').strip().lower()
+        if order not in ('asc', 'desc'):
+            return None, {}, create_error_response(
+                'Order must be "asc" or "desc"',
+                400,
+                'INVALID_ORDER'
+            )
+        
+        apps = data_store.sort_apps(apps, sort, descending=order == 'desc')
+        extra['sort'] = sort
+        extra['order'] = order
+    
+    if 'page' in request.args or 'per_page' in request.args:
+        pagination, error = parse_pagination()
+        if error:
+            return None, {}, error
+        apps, extra['pagination'] = paginate(apps, *pagination)
+    
+    return apps, extra, None
+
+
+def parse_scope() -> Tuple[Optional[str], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    Parse and validate the 'scope' query parameter for package indexes.
+    
+    Returns:
+        Tuple of (scope, None) on success or (None, error_response)
+    """
+    scope = request.args.get('scope', 'latest').strip().lower()
+    
+    if scope not in ('latest', 'any'):
+        return None, create_error_response(
+            'Scope must be "latest" or "any"',
+            400,
+            'INVALID_SCOPE'
+        )
+    
+    return scope, None
+
+
+def create_error_response(
+    message: str, 
+    status_code: int = 400,
+    error_code: Optional[str] = None
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Create a standardized error response.
+    
+    Args:
+        message: Error message
+        status_code: HTTP status code
+        error_code: Optional error code for programmatic handling
+        
+    Returns:
+        Tuple of (response_dict, status_code)
+    """
+    response = {
+        'success': False,
+        'error': {
+            'message': message,
+            'code': error_code or f'ERROR_{status_code}',
+            'status': status_code
+        },
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }
+    return response, status_code
+
+
+def create_success_response(
+    data: Any,
+    message: Optional[str] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Create a standardized success response.
+    
+    Args:
+        data: Response data
+        message: Optional success message
+        **kwargs: Additional fields to include in response
+        
+    Returns:
+        Response dictionary
+    """
+    response = {
+        'success': True,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        **kwargs
+    }
+    
+    if message:
+        response['message'] = message
+    
+    # Handle different data types
+    if isinstance(data, list):
+        response['data'] = data
+        response['count'] = len(data)
+    elif isinstance(data, dict):
+        response.update(data)
+    else:
+        response['data'] = data
+    
+    return response
+
+
+# =============================================================================
+# ERROR HANDLERS
+# =============================================================================
+
+@app.errorhandler(404)
+def not_found_error(error):
+    """Handle 404 errors."""
+    logger.warning(f"404 error: {request.url}")
+    return create_error_response(
+        'Endpoint not found',
+        404,
+        'ENDPOINT_NOT_FOUND'
+    )
+
+
+@app.errorhandler(405)
+def method_not_allowed_error(error):
+    """Handle 405 errors."""
+    logger.warning(f"405 error: {request.method} {request.url}")
+    return create_error_response(
+        f'Method {request.method} not allowed for this endpoint',
+        405,
+        'METHOD_NOT_ALLOWED'
+    )
+
+
+@app.errorhandler(500)
+def internal_server_error(error):
+    """Handle 500 errors."""
+    logger.error(f"500 error: {error}")
+    return create_error_response(
+        'Internal server error occurred',
+        500,
+        'INTERNAL_SERVER_ERROR'
+    )
+
+
+@app.errorhandler(Exception)
+def handle_unexpected_error(error):
+    """Handle unexpected errors."""
+    logger.error(f"Unexpected error: {error}", exc_info=True)
+    return create_error_response(
+        'An unexpected error occurred',
+        500,
+        'UNEXPECTED_ERROR'
+    )
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+@app.before_request
+def before_request():
+    """Execute before each request."""
+    # Log request
+    logger.info(f"{request.method} {request.path} from {request.remote_addr}")
+    
+    # Health checks report readiness themselves instead of waiting
+    if request.endpoint == 'health_check':
+        return None
+    
+    # Wait for a background load still in progress, before taking any slot
+    if not data_store_ready.is_set():
+        data_store_ready.wait(Config.DATA_READY_TIMEOUT)
+    
+    # Check if data store is available
+    if data_store is None:
+        return create_error_response(
+            'Service temporarily unavailable - data not loaded',
+            503,
+            'DATA_NOT_AVAILABLE'
+        )
+    
+    # Shed heavy requests quickly when saturated so cheap routes stay responsive.
+    # Cached views admit on a cache miss instead, so hits are served regardless.
+    view = app.view_functions.get(request.endpoint)
+    if not getattr(view, 'response_cached', False):
+        return admit_heavy_request()
+
+
+@app.after_request
+def after_request(response: Response) -> Response:
+    """
+    Execute after each request.
+    Add additional headers for security and caching.
+    
+    Args:
+        response: Flask response object
+        
+    Returns:
+        Modified response object
+    """
+    # Hold the admission slot until the body (possibly streamed) is fully sent
+    if g.pop('admission_slot', False):
+        response.call_on_close(admission_controller.release)
+    
+    # Add CORS headers
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    
+    # Add cache control headers (no caching) unless the view chose its own
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = Config.CACHE_CONTROL
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
+    
+    # Add security headers
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['X-Frame-Options'] = 'DENY'
+    response.headers['X-XSS-Protection'] = '1; mode=block'
+    
+    return response
+
+
+@app.teardown_request
+def teardown_request(error: Optional[BaseException]) -> None:
+    """
+    Execute when the request context is torn down.
+    Release an admission slot if no response took ownership of it.
+    
+    Args:
+        error: Unhandled exception, if any
+    """
+    if g.pop('admission_slot', False):
+        admission_controller.release()
+
+
+# =============================================================================
+# API ENDPOINTS
+# =============================================================================
+
+@app.route('/debug/memory', methods=['GET'])
+@timing_decorator
+def debug_memory():
+    """
+    Report the memory footprint of the current data store snapshot.
+    Disabled unless DROIDX_DEBUG_TOKEN is set; the token must be sent in the
+    X-Debug-Token header.
+    
+    Query Parameters:
+        trace: '1' to also reload the data under tracemalloc (slow, doubles
+            memory briefly and slows every thread while it runs)
+        
+    Returns:
+        Retained sizes by field and index, and optional allocation trace;
+        409 TRACE_IN_PROGRESS if another trace is running
+    """
+    if not Config.DEBUG_TOKEN:
+        return create_error_response(
+            'Endpoint not found',
+            404,
+            'ENDPOINT_NOT_FOUND'
+        )
+    
+    token = request.headers.get('X-Debug-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), Config.DEBUG_TOKEN.encode('utf-8')):
+        return create_error_response(
+            'Invalid or missing debug token',
+            403,
+            'FORBIDDEN'
+        )
+    
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    report = {
+        'memory': memory_report(data_store),
+        'max_rss_bytes': get_max_rss_bytes()
+    }
+    
+    if request.args.get('trace') == '1':
+        load_trace = trace_load_allocations(data_store.data_file, Config.MEMORY_TRACE_TOP)
+        if load_trace is None:
+            return create_error_response(
+                'A memory trace is already running - retry when it finishes',
+                409,
+                'TRACE_IN_PROGRESS'
+            )
+        report['load_trace'] = load_trace
+    
+    return create_success_response(report)
+
+
+@app.route('/', methods=['GET'])
+@timing_decorator
+def index():
+    """
+    API root endpoint - provides API documentation.
+    
+    Returns:
+        API information and available endpoints
+    """
+    return create_success_response({
+        'name': Config.API_NAME,
+        'version': Config.API_VERSION,
+        'description': 'Production-ready F-Droid repository API with unlimited requests',
+        'documentation': 'https://github.com/iambhvsh/droidx',
+        'endpoints': {
+            'GET /': 'API documentation (this page)',
+            'GET /health': 'Health check endpoint',
+            'GET /apps?repo=<name>': 'Get all applications (excluding games)',
+            'GET /games': 'Get all games',
+            'GET /all?sort=<field>&order=asc|desc': 'Get all apps and games',
+            'GET /export.ndjson': 'Stream apps or packages as NDJSON (filters, fields, gzip)',
+            'GET /app/<app_id>': 'Get specific application by ID',
+            'GET /app/<app_id>/similar': 'Get similar applications',
+            'GET /icon/<app_id>?size=48|96|192&format=png|webp': 'Get a mirrored icon thumbnail',
+            'GET /search?q=<query>': 'Search applications',
+            'GET /suggest?q=<prefix>': 'Autocomplete suggestions (id, name, icon)',
+            'GET /repos': 'Get source repositories with counts',
+            'GET /categories': 'Get all categories with counts',
+            'GET /category/<name>': 'Get apps in specific category',
+            'GET /permissions': 'Get all permissions with counts',
+            'GET /permission/<name>?scope=latest|any': 'Get apps requesting a permission (paginated)',
+            'GET /features': 'Get all features with counts',
+            'GET /feature/<name>?scope=latest|any': 'Get apps requiring a feature (paginated)',
+            'GET /apk/<hash>': 'Find app and package by APK hash',
+            'GET /apk/file/<apk_name>': 'Find app and package by APK file name',
+            'POST /apk/lookup': 'Batch lookup of APK hashes and file names',
+            'GET /compatible?sdk=<n>&abis=<a,b>&features=<f,g>': 'Get apps installable on a device',
+            'GET /latest?limit=<n>': 'Get recently updated apps',
+            'GET /random': 'Get random application',
+            'GET /stats': 'Get repository statistics'
+        },
+        'features': [
+            'No rate limits - unlimited requests',
+            'Full CORS support for all origins',
+            'Sub-millisecond response times',
+            'Comprehensive error handling',
+            'Daily automated data updates',
+            'Production-grade reliability'
+        ],
+        'metadata': data_store.get_metadata() if data_store else None
+    })
+
+
+@app.route('/health', methods=['GET'])
+@timing_decorator
+def health_check():
+    """
+    Health check endpoint for monitoring and load balancers.
+    
+    Returns:
+        Health status and system information
+    """
+    if not data_store_ready.is_set():
+        response, status = create_error_response(
+            'Data store is still loading',
+            503,
+            'STARTING'
+        )
+        response['ready'] = False
+        response['startup'] = startup_profile.report()
+        return response, status
+    
+    if data_store is None:
+        return create_error_response(
+            'Data store not initialized',
+            503,
+            'UNHEALTHY'
+        )
+    
+    metadata = data_store.get_metadata()
+    
+    return create_success_response({
+        'status': 'healthy',
+        'uptime': 'operational',
+        'ready': True,
+        'startup': startup_profile.report(),
+        'data': {
+            'apps_loaded': metadata.get('apps_count', 0),
+            'last_updated': metadata.get('last_updated'),
+            'loaded_at': metadata.get('loaded_at')
+        },
+        'cache': response_cache.stats(),
+        'admission': admission_controller.stats()
+    })
+
+
+@app.route('/apps', methods=['GET'])
+@timing_decorator
+def get_apps():
+    """
+    Get all applications (excluding games).
+    
+    Query Parameters:
+        repo: Only include apps from this repository (optional)
+        sort, order: Sort field and 'asc'/'desc' direction (optional)
+        page, per_page: Paginate the results (optional)
+    
+    Returns:
+        List of all non-game applications
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    all_apps, error = apply_repo_filter(data_store.get_all_apps())
+    if error:
+        return error
+    
+    apps = [app for app in all_apps if not is_game(app)]
+    non_games = len(apps)
+    
+    apps, extra, error = apply_sort_and_pagination(apps)
+    if error:
+        return error
+    
+    return create_success_response(
+        apps,
+        total=len(all_apps),
+        games=len(all_apps) - non_games,
+        **extra
+    )
+
+
+@app.route('/games', methods=['GET'])
+@timing_decorator
+def get_games():
+    """
+    Get all games.
+    
+    Query Parameters:
+        repo: Only include apps from this repository (optional)
+        sort, order: Sort field and 'asc'/'desc' direction (optional)
+        page, per_page: Paginate the results (optional)
+    
+    Returns:
+        List of all game applications
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    all_apps, error = apply_repo_filter(data_store.get_all_apps())
+    if error:
+        return error
+    
+    games = [app for app in all_apps if is_game(app)]
+    total_games = len(games)
+    
+    games, extra, error = apply_sort_and_pagination(games)
+    if error:
+        return error
+    
+    return create_success_response(
+        games,
+        total=len(all_apps),
+        non_games=len(all_apps) - total_games,
+        **extra
+    )
+
+
+@app.route('/all', methods=['GET'])
+@timing_decorator
+def get_all():
+    """
+    Get all applications and games.
+    
+    Query Parameters:
+        repo: Only include apps from this repository (optional)
+        sort, order: Sort field and 'asc'/'desc' direction (optional)
+        page, per_page: Paginate the results (optional)
+    
+    Returns:
+        Complete list of all applications
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    all_apps, error = apply_repo_filter(data_store.get_all_apps())
+    if error:
+        return error
+    
+    all_apps, extra, error = apply_sort_and_pagination(all_apps)
+    if error:
+        return error
+    
+    return create_success_response(all_apps, **extra)
+
+
+@app.route('/export.ndjson', methods=['GET'])
+def export_ndjson():
+    """
+    Stream applications as newline-delimited JSON for bulk ETL.
+    Records are serialized one at a time from the current snapshot, so server
+    memory does not grow with the export size.
+    
+    Query Parameters:
+        rows: 'apps' (default, one line per app) or 'packages' (one line per app/package)
+        type: 'all' (default), 'apps' (non-games) or 'games'
+        category: Only include apps in this category (optional)
+        q: Only include apps matching this search query (optional)
+        repo: Only include apps from this repository (optional)
+        fields: Comma-separated fields to keep in each line (optional)
+        gzip: '1' to force gzip; otherwise negotiated via Accept-Encoding
+        
+    Returns:
+        Streaming application/x-ndjson response
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    rows = request.args.get('rows', 'apps').strip().lower()
+    if rows not in ('apps', 'packages'):
+        return create_error_response(
+            'Rows must be "apps" or "packages"',
+            400,
+            'INVALID_ROWS'
+        )
+    
+    app_type = request.args.get('type', 'all').strip().lower()
+    if app_type not in ('all', 'apps', 'games'):
+        return create_error_response(
+            'Type must be "all", "apps" or "games"',
+            400,
+            'INVALID_TYPE'
+        )
+    
+    query = request.args.get('q', '').strip()
+    category = request.args.get('category', '').strip()
+    
+    if query:
+        apps = data_store.search_apps(query)
+    elif category:
+        apps = data_store.get_apps_by_category(category)
+    else:
+        apps = data_store.get_all_apps()
+    
+    if query and category:
+        apps = [app for app in apps if category in app.get('categories', [])]
+    
+    apps, error = apply_repo_filter(apps)
+    if error:
+        return error
+    
+    if app_type != 'all':
+        want_games = app_type == 'games'
+        apps = [app for app in apps if is_game(app) == want_games]
+    
+    fields = parse_fields()
+    source = iter_package_rows(apps) if rows == 'packages' else iter(apps)
+    records = (project(record, fields) for record in source)
+    
+    # accept_encodings honours q-values, so "gzip;q=0" refuses compression
+    compress = (
+        request.args.get('gzip') == '1' or
+        request.accept_encodings['gzip'] > 0
+    )
+    
+    response = Response(
+        stream_ndjson(records, compress),
+        mimetype='application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="droidx-{rows}.ndjson"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@app.route('/app/<app_id>', methods=['GET'])
+@timing_decorator
+def get_app(app_id: str):
+    """
+    Get detailed information about a specific application.
+    
+    Args:
+        app_id: Application identifier
+        
+    Returns:
+        Application details or 404 error
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    if not app_id or not app_id.strip():
+        return create_error_response(
+            'App ID cannot be empty',
+            400,
+            'INVALID_APP_ID'
+        )
+    
+    app = data_store.find_app_by_id(app_id)
+    
+    if app is None:
+        return create_error_response(
+            f'Application with ID "{app_id}" not found',
+            404,
+            'APP_NOT_FOUND'
+        )
+    
+    return create_success_response({'app': app})
+
+
+@app.route('/app/<app_id>/similar', methods=['GET'])
+@timing_decorator
+def get_similar_apps(app_id: str):
+    """
+    Get applications similar to a specific application.
+    Served from the updater's per-snapshot table of TF-IDF neighbors; answers
+    503 STARTING at once while the table is still loading.
+    
+    Args:
+        app_id: Application identifier
+        
+    Query Parameters:
+        limit: Maximum number of similar apps (optional)
+        
+    Returns:
+        List of similar applications with cosine scores
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    state = data_store.get_similarity_state()
+    
+    if state == 'pending':
+        response, status = create_error_response(
+            'Similar apps are still loading - please retry shortly',
+            503,
+            'STARTING'
+        )
+        return response, status, {'Retry-After': str(Config.RETRY_AFTER_SECONDS)}
+    
+    if state == 'unavailable':
+        return create_error_response(
+            'Similar apps are unavailable for this dataset',
+            503,
+            'FEATURE_UNAVAILABLE'
+        )
+    
+    limit = request.args.get('limit', Config.DEFAULT_SIMILAR, type=int)
+    
+    if limit < 1 or limit > Config.SIMILAR_TOP_K:
+        return create_error_response(
+            f'Limit must be between 1 and {Config.SIMILAR_TOP_K}',
+            400,
+            'INVALID_LIMIT'
+        )
+    
+    similar = data_store.get_similar_apps(app_id, limit)
+    
+    if similar is None:
+        return create_error_response(
+            f'Application with ID "{app_id}" not found',
+            404,
+            'APP_NOT_FOUND'
+        )
+    
+    return create_success_response(
+        similar,
+        app_id=app_id
+    )
+
+
+@app.route('/icon/<app_id>', methods=['GET'])
+def get_icon(app_id: str):
+    """
+    Serve a locally mirrored icon thumbnail.
+    Falls back to a redirect to the upstream icon when no thumbnail exists.
+    
+    Args:
+        app_id: Application identifier
+        
+    Query Parameters:
+        size: Edge length in pixels, one of Config.ICON_SIZES (optional)
+        format: 'png' (default) or 'webp'
+        v: Content hash from a previous response's ETag; enables immutable caching
+        
+    Returns:
+        Image response with ETag and long-lived cache headers
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    size = request.args.get('size', Config.DEFAULT_ICON_SIZE, type=int)
+    if size not in Config.ICON_SIZES:
+        return create_error_response(
+            f'Size must be one of: {", ".join(str(s) for s in Config.ICON_SIZES)}',
+            400,
+            'INVALID_SIZE'
+        )
+    
+    fmt = request.args.get('format', 'png').strip().lower()
+    if fmt not in Config.ICON_FORMATS:
+        return create_error_response(
+            f'Format must be one of: {", ".join(Config.ICON_FORMATS)}',
+            400,
+            'INVALID_FORMAT'
+        )
+    
+    # Only known ids reach the filesystem, which also rules out path traversal
+    app = data_store.find_app_by_id(app_id)
+    if app is None:
+        return create_error_response(
+            f'Application with ID "{app_id}" not found',
+            404,
+            'APP_NOT_FOUND'
+        )
+    
+    path = os.path.join(Config.ICONS_DIR, str(size), f'{app_id}.{fmt}')
+    if not os.path.isfile(path):
+        if app.get('icon'):
+            return redirect(app['icon'], code=302)
+        return create_error_response(
+            f'No icon available for "{app_id}"',
+            404,
+            'ICON_NOT_FOUND'
+        )
+    
+    icon_hash = data_store.get_icon_hash(app_id, size, fmt)
+    response = send_file(
+        path,
+        mimetype=Config.ICON_FORMATS[fmt],
+        etag=icon_hash or True,
+        conditional=True
+    )
+    
+    if icon_hash and request.args.get('v') == icon_hash:
+        response.headers['Cache-Control'] = f'public, max-age={Config.ICON_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = f'public, max-age={Config.ICON_MAX_AGE}'
+    return response
+
+
+@app.route('/search', methods=['GET'])
+@cached_response('q', 'repo', 'sort', 'order', 'page', 'per_page')
+@timing_decorator
+def search():
+    """
+    Search applications by query string.
+    Searches across name, summary, description, and ID fields.
+    
+    Query Parameters:
+        q: Search query (required)
+        repo: Only include apps from this repository (optional)
+        sort, order: Sort field and 'asc'/'desc' direction (optional)
+        page, per_page: Paginate the results (optional)
+        
+    Returns:
+        List of matching applications
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return create_error_response(
+            'Query parameter "q" is required and cannot be empty',
+            400,
+            'MISSING_QUERY'
+        )
+    
+    if len(query) < 2:
+        return create_error_response(
+            'Query must be at least 2 characters long',
+            400,
+            'QUERY_TOO_SHORT'
+        )
+    
+    results, error = apply_repo_filter(data_store.search_apps(query))
+    if error:
+        return error
+    
+    results, extra, error = apply_sort_and_pagination(results)
+    if error:
+        return error
+    
+    return create_success_response(
+        results,
+        query=query,
+        **extra
+    )
+
+
+@app.route('/suggest', methods=['GET'])
+@timing_decorator
+def suggest():
+    """
+    Autocomplete suggestions for a typed prefix.
+    Matches the start of app names, name words, ids and id segments.
+    
+    Query Parameters:
+        q: Prefix (required, at least 1 character)
+        limit: Maximum number of suggestions (optional)
+        
+    Returns:
+        List of lightweight {id, name, icon} suggestions
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return create_error_response(
+            'Query parameter "q" is required and cannot be empty',
+            400,
+            'MISSING_QUERY'
+        )
+    
+    limit = request.args.get('limit', Config.DEFAULT_SUGGESTIONS, type=int)
+    
+    if limit < 1 or limit > Config.MAX_SUGGESTIONS:
+        return create_error_response(
+            f'Limit must be between 1 and {Config.MAX_SUGGESTIONS}',
+            400,
+            'INVALID_LIMIT'
+        )
+    
+    suggestions = data_store.suggest(query, limit)
+    
+    return create_success_response(
+        suggestions,
+        query=query
+    )
+
+
+@app.route('/repos', methods=['GET'])
+@timing_decorator
+def get_repos():
+    """
+    Get source repositories with application counts.
+    
+    Returns:
+        List of repositories in merge priority order
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    return create_success_response(data_store.get_repositories())
+
+
+@app.route('/categories', methods=['GET'])
+@timing_decorator
+def get_categories():
+    """
+    Get all categories with application counts.
+    
+    Returns:
+        List of categories sorted by app count (descending)
+    """
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    categories = data_store.get_all_categories()
+    
+    return create_success_response(
+        categories,
+        message=f'Found {len(categories)} categories'
+    )
 
 
-@app.after_request
-def after_request(response: Response) -> Response:
+@app.route('/category/<category_name>', methods=['GET'])
+@cached_response('repo', 'sort', 'order', 'page', 'per_page')
+@timing_decorator
+def get_category_apps(category_name: str):
     """
-    Execute after each request.
-    Add additional headers for security and caching.
+    Get all applications in a specific category.
     
     Args:
-        response: Flask response object
+        category_name: Name of the category
+        
+    Query Parameters:
+        repo: Only include apps from this repository (optional)
+        sort, order: Sort field and 'asc'/'desc' direction (optional)
+        page, per_page: Paginate the results (optional)
         
     Returns:
-        Modified response object
+        List of applications in the category
     """
-    # Add CORS headers
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    if data_store is None:
+        return create_error_response('Data not available', 503)
     
-    # Add cache control headers (no caching)
-    response.headers['Cache-Control'] = Config.CACHE_CONTROL
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    if not category_name or not category_name.strip():
+        return create_error_response(
+            'Category name cannot be empty',
+            400,
+            'INVALID_CATEGORY'
+        )
     
-    # Add security headers
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
+    apps, error = apply_repo_filter(data_store.get_apps_by_category(category_name))
+    if error:
+        return error
     
-    return response
-
+    if not apps:
+        # Check if category exists
+        all_categories = data_store.get_all_categories()
+        category_exists = any(cat['name'] == category_name for cat in all_categories)
+        
+        if not category_exists:
+            return create_error_response(
+                f'Category "{category_name}" not found',
+                404,
+                'CATEGORY_NOT_FOUND'
+            )
+    
+    apps, extra, error = apply_sort_and_pagination(apps)
+    if error:
+        return error
+    
+    return create_success_response(
+        apps,
+        category=category_name,
+        **extra
+    )
 
-# =============================================================================
-# API ENDPOINTS
-# =============================================================================
 
-@app.route('/', methods=['GET'])
+@app.route('/permissions', methods=['GET'])
+@cached_response('scope')
 @timing_decorator
-def index():
+def get_permissions():
     """
-    API root endpoint - provides API documentation.
+    Get all permissions with application counts.
     
+    Query Parameters:
+        scope: 'latest' (default) or 'any' package
+        
     Returns:
-        API information and available endpoints
+        List of permissions sorted by app count (descending)
     """
-    return create_success_response({
-        'name': Config.API_NAME,
-        'version': Config.API_VERSION,
-        'description': 'Production-ready F-Droid repository API with unlimited requests',
-        'documentation': 'https://github.com/iambhvsh/droidx',
-        'endpoints': {
-            'GET /': 'API documentation (this page)',
-            'GET /health': 'Health check endpoint',
-            'GET /apps': 'Get all applications (excluding games)',
-            'GET /games': 'Get all games',
-            'GET /all': 'Get all apps and games',
-            'GET /app/<app_id>': 'Get specific application by ID',
-            'GET /search?q=<query>': 'Search applications',
-            'GET /categories': 'Get all categories with counts',
-            'GET /category/<name>': 'Get apps in specific category',
-            'GET /latest?limit=<n>': 'Get recently updated apps',
-            'GET /random': 'Get random application',
-            'GET /stats': 'Get repository statistics'
-        },
-        'features': [
-            'No rate limits - unlimited requests',
-            'Full CORS support for all origins',
-            'Sub-millisecond response times',
-            'Comprehensive error handling',
-            'Daily automated data updates',
-            'Production-grade reliability'
-        ],
-        'metadata': data_store.get_metadata() if data_store else None
-    })
+    if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    scope, error = parse_scope()
+    if error:
+        return error
+    
+    permissions = data_store.get_all_permissions(scope)
+    
+    return create_success_response(
+        permissions,
+        scope=scope
+    )
 
 
-@app.route('/health', methods=['GET'])
+@app.route('/permission/<permission_name>', methods=['GET'])
+@cached_response('scope', 'page', 'per_page')
 @timing_decorator
-def health_check():
+def get_permission_apps(permission_name: str):
     """
-    Health check endpoint for monitoring and load balancers.
+    Get applications requesting a specific permission.
     
+    Args:
+        permission_name: Full or short permission name (e.g. READ_CONTACTS)
+        
+    Query Parameters:
+        scope: 'latest' (default) or 'any' package
+        page: Page number (optional, default 1)
+        per_page: Results per page (optional)
+        
     Returns:
-        Health status and system information
+        Paginated list of applications requesting the permission
     """
     if data_store is None:
+        return create_error_response('Data not available', 503)
+    
+    scope, error = parse_scope()
+    if error:
+        return error
+    
+    pagination, error = parse_pagination()
+    if error:
+        return error
+    
+    apps = data_store.get_apps_by_permission(permission_name.strip(), scope)
+    
+    if apps is None:
         return create_error_response(
-            'Data store not initialized',
-            503,
-            'UNHEALTHY'
+            f'Permission "{permission_name}" not found',
+            404,
+            'PERMISSION_NOT_FOUND'
         )
     
-    metadata = data_store.get_metadata()
+    page_apps, page_info = paginate(apps, *pagination)
     
-    return create_success_response({
-        'status': 'healthy',
-        'uptime': 'operational',
-        'data': {
-            'apps_loaded': metadata.get('apps_count', 0),
-            'last_updated': metadata.get('last_updated'),
-            'loaded_at': metadata.get('loaded_at')
-        }
-    })
+    return create_success_response(
+        page_apps,
+        permission=permission_name,
+        scope=scope,
+        pagination=page_info
+    )
 
 
-@app.route('/apps', methods=['GET'])
+@app.route('/features', methods=['GET'])
+@cached_response('scope')
 @timing_decorator
-def get_apps():
+def get_features():
     """
-    Get all applications (excluding games).
+    Get all features with application counts.
     
+    Query Parameters:
+        scope: 'latest' (default) or 'any' package
+        
     Returns:
-        List of all non-game applications
+        List of features sorted by app count (descending)
     """
     if data_store is None:
         return create_error_response('Data not available', 503)
     
-    all_apps = data_store.get_all_apps()
-    apps = [app for app in all_apps if not is_game(app)]
+    scope, error = parse_scope()
+    if error:
+        return error
+    
+    features = data_store.get_all_features(scope)
     
     return create_success_response(
-        apps,
-        total=len(all_apps),
-        games=len(all_apps) - len(apps)
+        features,
+        scope=scope
     )
 
 
-@app.route('/games', methods=['GET'])
+@app.route('/feature/<feature_name>', methods=['GET'])
+@cached_response('scope', 'page', 'per_page')
 @timing_decorator
-def get_games():
+def get_feature_apps(feature_name: str):
     """
-    Get all games.
+    Get applications requiring a specific feature.
     
+    Args:
+        feature_name: Feature name (e.g. android.hardware.camera)
+        
+    Query Parameters:
+        scope: 'latest' (default) or 'any' package
+        page: Page number (optional, default 1)
+        per_page: Results per page (optional)
+        
     Returns:
-        List of all game applications
+        Paginated list of applications requiring the feature
     """
     if data_store is None:
         return create_error_response('Data not available', 503)
     
-    all_apps = data_store.get_all_apps()
-    games = [app for app in all_apps if is_game(app)]
+    scope, error = parse_scope()
+    if error:
+        return error
+    
+    pagination, error = parse_pagination()
+    if error:
+        return error
+    
+    apps = data_store.get_apps_by_feature(feature_name.strip(), scope)
+    
+    if apps is None:
+        return create_error_response(
+            f'Feature "{feature_name}" not found',
+            404,
+            'FEATURE_NOT_FOUND'
+        )
+    
+    page_apps, page_info = paginate(apps, *pagination)
     
     return create_success_response(
-        games,
-        total=len(all_apps),
-        non_games=len(all_apps) - len(games)
+        page_apps,
+        feature=feature_name,
+        scope=scope,
+        pagination=page_info
     )
 
 
-@app.route('/all', methods=['GET'])
+@app.route('/apk/<apk_hash>', methods=['GET'])
 @timing_decorator
-def get_all():
+def get_apk_by_hash(apk_hash: str):
     """
-    Get all applications and games.
+    Look up the application and package for an APK hash.
     
+    Args:
+        apk_hash: Hex-encoded APK hash (SHA-256 for current repositories)
+        
     Returns:
-        Complete list of all applications
+        Matching application and package or 404 error
     """
     if data_store is None:
         return create_error_response('Data not available', 503)
     
-    all_apps = data_store.get_all_apps()
+    match = data_store.find_apk_by_hash(apk_hash)
+    
+    if match is None:
+        return create_error_response(
+            f'APK with hash "{apk_hash}" not found',
+            404,
+            'APK_NOT_FOUND'
+        )
     
-    return create_success_response(all_apps)
+    return create_success_response({'apk': match})
 
 
-@app.route('/app/<app_id>', methods=['GET'])
+@app.route('/apk/file/<apk_name>', methods=['GET'])
 @timing_decorator
-def get_app(app_id: str):
+def get_apk_by_name(apk_name: str):
     """
-    Get detailed information about a specific application.
+    Look up the application and package for an APK file name.
     
     Args:
-        app_id: Application identifier
+        apk_name: APK file name (e.g. org.example_42.apk)
         
     Returns:
-        Application details or 404 error
+        Matching application and package or 404 error
     """
     if data_store is None:
         return create_error_response('Data not available', 503)
     
-    if not app_id or not app_id.strip():
-        return create_error_response(
-            'App ID cannot be empty',
-            400,
-            'INVALID_APP_ID'
-        )
-    
-    app = data_store.find_app_by_id(app_id)
+    match = data_store.find_apk_by_name(apk_name)
     
-    if app is None:
+    if match is None:
         return create_error_response(
-            f'Application with ID "{app_id}" not found',
+            f'APK file "{apk_name}" not found',
             404,
-            'APP_NOT_FOUND'
+            'APK_NOT_FOUND'
         )
     
-    return create_success_response({'app': app})
+    return create_success_response({'apk': match})
 
 
-@app.route('/search', methods=['GET'])
+@app.route('/apk/lookup', methods=['POST'])
 @timing_decorator
-def search():
+def lookup_apks():
     """
-    Search applications by query string.
-    Searches across name, summary, description, and ID fields.
+    Batch lookup of APK hashes and/or file names.
     
-    Query Parameters:
-        q: Search query (required)
+    Request Body (JSON):
+        hashes: List of APK hashes (optional)
+        apk_names: List of APK file names (optional)
         
     Returns:
-        List of matching applications
+        Mappings from each requested hash / file name to its match (or null)
     """
     if data_store is None:
         return create_error_response('Data not available', 503)
     
-    query = request.args.get('q', '').strip()
+    body = request.get_json(silent=True)
     
-    if not query:
+    if not isinstance(body, dict):
         return create_error_response(
-            'Query parameter "q" is required and cannot be empty',
+            'Request body must be a JSON object',
             400,
-            'MISSING_QUERY'
+            'INVALID_BODY'
         )
     
-    if len(query) < 2:
+    hashes = body.get('hashes') or []
+    apk_names = body.get('apk_names') or []
+    
+    if not isinstance(hashes, list) or not isinstance(apk_names, list) or \
+            not all(isinstance(v, str) for v in hashes + apk_names):
         return create_error_response(
-            'Query must be at least 2 characters long',
+            '"hashes" and "apk_names" must be lists of strings',
             400,
-            'QUERY_TOO_SHORT'
+            'INVALID_BODY'
         )
     
-    results = data_store.search_apps(query)
-    
-    return create_success_response(
-        results,
-        query=query
-    )
-
-
-@app.route('/categories', methods=['GET'])
-@timing_decorator
-def get_categories():
-    """
-    Get all categories with application counts.
+    if not hashes and not apk_names:
+        return create_error_response(
+            'At least one of "hashes" or "apk_names" is required',
+            400,
+            'MISSING_QUERY'
+        )
     
-    Returns:
-        List of categories sorted by app count (descending)
-    """
-    if data_store is None:
-        return create_error_response('Data not available', 503)
+    if len(hashes) + len(apk_names) > Config.MAX_BATCH_SIZE:
+        return create_error_response(
+            f'Batch size cannot exceed {Config.MAX_BATCH_SIZE} lookups',
+            400,
+            'BATCH_TOO_LARGE'
+        )
     
-    categories = data_store.get_all_categories()
+    hash_results = {h: data_store.find_apk_by_hash(h) for h in hashes}
+    name_results = {n: data_store.find_apk_by_name(n) for n in apk_names}
+    found = sum(1 for m in hash_results.values() if m) + sum(1 for m in name_results.values() if m)
     
-    return create_success_response(
-        categories,
-        message=f'Found {len(categories)} categories'
-    )
+    return create_success_response({
+        'hashes': hash_results,
+        'apk_names': name_results,
+        'requested': len(hash_results) + len(name_results),
+        'found': found
+    })
 
 
-@app.route('/category/<category_name>', methods=['GET'])
+@app.route('/compatible', methods=['GET'])
+@cached_response('sdk', 'abis', 'features', 'page', 'per_page')
 @timing_decorator
-def get_category_apps(category_name: str):
+def get_compatible_apps():
     """
-    Get all applications in a specific category.
+    Get applications installable on a device profile.
+    Each app is returned with its newest package that fits the device.
     
-    Args:
-        category_name: Name of the category
+    Query Parameters:
+        sdk: Device API level (required)
+        abis: Comma-separated supported ABIs (optional; skipped when absent)
+        features: Comma-separated available features (optional; skipped when absent)
+        page, per_page: Paginate the results (optional)
         
     Returns:
-        List of applications in the category
+        List of {id, name, icon, package} for compatible applications
     """
     if data_store is None:
         return create_error_response('Data not available', 503)
     
-    if not category_name or not category_name.strip():
+    sdk = request.args.get('sdk', type=int)
+    
+    if sdk is None or sdk < 1 or sdk > Config.MAX_SDK_LEVEL:
         return create_error_response(
-            'Category name cannot be empty',
+            f'Query parameter "sdk" must be an API level between 1 and {Config.MAX_SDK_LEVEL}',
             400,
-            'INVALID_CATEGORY'
+            'INVALID_SDK'
         )
     
-    apps = data_store.get_apps_by_category(category_name)
+    def parse_list(name: str) -> Optional[List[str]]:
+        if name not in request.args:
+            return None
+        return [v.strip() for v in request.args.get(name, '').split(',') if v.strip()]
     
-    if not apps:
-        # Check if category exists
-        all_categories = data_store.get_all_categories()
-        category_exists = any(cat['name'] == category_name for cat in all_categories)
-        
-        if not category_exists:
-            return create_error_response(
-                f'Category "{category_name}" not found',
-                404,
-                'CATEGORY_NOT_FOUND'
-            )
+    abis = parse_list('abis')
+    features = parse_list('features')
+    
+    apps = data_store.get_compatible_apps(sdk, abis, features)
+    total = len(data_store.get_all_apps())
+    extra: Dict[str, Any] = {}
+    
+    if 'page' in request.args or 'per_page' in request.args:
+        pagination, error = parse_pagination()
+        if error:
+            return error
+        apps, extra['pagination'] = paginate(apps, *pagination)
     
     return create_success_response(
         apps,
-        category=category_name
+        device={'sdk': sdk, 'abis': abis, 'features': features},
+        total_apps=total,
+        **extra
     )
 
 
 @app.route('/latest', methods=['GET'])
+@cached_response('limit', 'repo')
 @timing_decorator
 def get_latest():
     """
@@ -700,6 +3254,7 @@ def get_latest():
     
     Query Parameters:
         limit: Maximum number of apps to return (optional)
+        repo: Only include apps from this repository (optional)
         
     Returns:
         List of recently updated applications
@@ -717,14 +3272,16 @@ def get_latest():
             'INVALID_LIMIT'
         )
     
-    all_apps = data_store.get_all_apps()
+    all_apps, error = apply_repo_filter(data_store.get_all_apps())
+    if error:
+        return error
     
-    # Filter apps with last_updated field and sort
-    apps_with_dates = [app for app in all_apps if app.get('last_updated')]
-    sorted_apps = sorted(
-        apps_with_dates,
-        key=lambda x: x.get('last_updated', ''),
-        reverse=True
+    # Apps with a last_updated field, newest first, from the presorted permutation
+    sorted_apps = data_store.sort_apps(
+        all_apps,
+        'last_updated',
+        descending=True,
+        include_missing=False
     )
     
     # Apply limit if specified
@@ -830,10 +3387,29 @@ def get_stats():
                 for lic, count in top_licenses
             ]
         },
-        'metadata': data_store.get_metadata()
+        'metadata': data_store.get_metadata(),
+        'cache': response_cache.stats(),
+        'admission': admission_controller.stats(),
+        'similarity': data_store.get_similarity_stats()
     })
 
 
+# =============================================================================
+# DATA STORE INITIALIZATION
+# =============================================================================
+
+# Started after every module-level definition so the loader thread never
+# races the rest of the import
+if Config.BACKGROUND_LOAD:
+    threading.Thread(
+        target=initialize_data_store,
+        name='droidx-data-loader',
+        daemon=True
+    ).start()
+else:
+    initialize_data_store()
+
+
 # =============================================================================
 # VERCEL SERVERLESS HANDLER
 # =============================================================================
@@ -848,6 +3424,24 @@ def get_stats():
 # =============================================================================
 
 if __name__ == '__main__':
+    # Cold-start report: wait for initialization, print phase timings, exit
+    if '--profile-startup' in sys.argv:
+        data_store_ready.wait()
+        print(json.dumps(startup_profile.report(), indent=2))
+        sys.exit(0 if data_store is not None else 1)
+    
+    # Memory report: retained sizes plus a traced reload, then exit
+    if '--memory-report' in sys.argv:
+        data_store_ready.wait()
+        if data_store is None:
+            sys.exit(1)
+        print(json.dumps({
+            'memory': memory_report(data_store),
+            'load_trace': trace_load_allocations(Config.DATA_FILE, Config.MEMORY_TRACE_TOP),
+            'max_rss_bytes': get_max_rss_bytes()
+        }, indent=2))
+        sys.exit(0)
+    
     # Development server
     logger.info(f"Starting {Config.API_NAME} API v{Config.API_VERSION}")
     logger.info(f"Data file: {Config.DATA_FILE}")
@@ -1,105 +1,294 @@
 #!/usr/bin/env python3
 """
 F-Droid Cache Update Script
-Downloads and parses the F-Droid repository index and saves it as JSON
+Downloads and parses one or more F-Droid-format repository indexes,
+merges them and saves the result as JSON
 """
 
 import requests
 import xml.etree.ElementTree as ET
 import json
+import hashlib
 import sys
 import os
+import io
+import re
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 
+try:
+    from PIL import Image
+except ImportError:
+    # Only needed when icon mirroring is enabled
+    Image = None
+
+try:
+    import numpy as np
+except ImportError:
+    # Only needed for the similar-apps table
+    np = None
+
 # F-Droid repository URLs
 FDROID_REPO_URL = "https://f-droid.org/repo"
-FDROID_INDEX_URL = f"{FDROID_REPO_URL}/index.xml"
-FDROID_ICON_BASE = f"{FDROID_REPO_URL}/icons-640"
+
+# Repositories to ingest, in priority order: "name=url,name=url".
+# When an app id appears in several repositories the earliest one wins.
+DEFAULT_REPOS = f"fdroid={FDROID_REPO_URL}"
+REPOS_ENV = "FDROID_REPOS"
+
+# App ids must be Android package names: they become file names (icons) and
+# URL segments, so ids from third-party repositories are validated on parse
+APP_ID_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9_]*(\.[A-Za-z][A-Za-z0-9_]*)+$')
+
+# Concurrency limits for downloads and XML parsing
+MAX_DOWNLOAD_WORKERS = 8
+MAX_PARSE_WORKERS = os.cpu_count() or 1
 
 # Output file and directory (FIXED: output path now matches workflow expectation)
 CACHE_DIR = "data"
 CACHE_FILE = os.path.join(CACHE_DIR, "apps.json")
 
+# Sharded layout: apps are bucketed by a hash of their id and each bucket is
+# written to shards/<sha256 of content>.json, so a daily update only adds the
+# shards whose apps changed. shards/root.json lists the shards and app order.
+# DATA_LAYOUT selects "sharded" (default), "single" (apps.json) or "both".
+DATA_LAYOUT_ENV = "DATA_LAYOUT"
+DATA_LAYOUTS = ('sharded', 'single', 'both')
+SHARDS_DIR = os.path.join(CACHE_DIR, "shards")
+SHARD_ROOT_FILE = os.path.join(SHARDS_DIR, "root.json")
+SHARD_COUNT = 256
+SHARD_FORMAT_VERSION = 1
+
+# Small sidecar describing the dataset so consumers need not re-parse it
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")
+MANIFEST_VERSION = 1
+
+# Similar-apps table: TF-IDF top-k neighbors per app, computed once per
+# snapshot here so the API only loads a lookup table
+SIMILAR_FILE = os.path.join(CACHE_DIR, "similar.json")
+SIMILAR_FORMAT_VERSION = 1
+SIMILAR_TOP_K = 20
+SIMILAR_MAX_FEATURES = int(os.environ.get("SIMILAR_MAX_FEATURES", 4096))
+SIMILAR_BATCH_SIZE = 256
+# Field weights applied as term-count multipliers
+SIMILAR_FIELD_WEIGHTS = (('name', 3), ('summary', 2), ('description', 1))
+SIMILAR_CATEGORY_WEIGHT = 2
+TOKEN_PATTERN = re.compile(r'[a-z0-9]{2,}')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+STOP_WORDS = frozenset(
+    'an and are as at be by can for from has have in is it its of on or that '
+    'the this to was with you your app apps android use using will not all '
+    'also more which other into any only'.split()
+)
+
+# Local icon mirror (opt-in with MIRROR_ICONS=1): thumbnails are written to
+# data/icons/<size>/<app_id>.<format>; the index remembers source hashes and
+# HTTP validators so unchanged icons are neither re-downloaded nor re-rendered
+MIRROR_ICONS_ENV = "MIRROR_ICONS"
+ICONS_DIR = os.path.join(CACHE_DIR, "icons")
+ICON_INDEX_FILE = os.path.join(ICONS_DIR, "index.json")
+ICON_SIZES = (48, 96, 192)
+ICON_FORMATS = ('png', 'webp')
+MAX_ICON_WORKERS = 16
+
 def get_text(element, tag):
     """Safely extract text from XML element"""
     child = element.find(tag)
     return child.text if child is not None and child.text else None
 
-def fetch_and_parse_fdroid_index():
-    """Fetch and parse F-Droid repository index"""
-    print("Fetching F-Droid index from:", FDROID_INDEX_URL)
+def get_list(element, tag):
+    """Extract the values of a comma-separated list element"""
+    text = get_text(element, tag)
+    return [value.strip() for value in text.split(',') if value.strip()] if text else []
+
+def get_permissions(pkg):
+    """
+    Collect a package's permissions as fully qualified names.
+    index.xml lists them in a comma-separated <permissions> element with the
+    "android.permission." prefix stripped; <uses-permission name="..."> elements
+    are only written for permissions that carry a maxSdkVersion.
+    """
+    names = [
+        name if '.' in name else f"android.permission.{name}"
+        for name in get_list(pkg, 'permissions')
+    ]
+    for tag in ('uses-permission', 'uses-permission-sdk-23'):
+        names.extend(perm.get('name') for perm in pkg.findall(tag) if perm.get('name'))
+    return list(dict.fromkeys(names))
+
+def get_features(pkg):
+    """Collect a package's features from the comma-separated <features> element"""
+    names = get_list(pkg, 'features')
+    names.extend(feat.get('name') for feat in pkg.findall('uses-feature') if feat.get('name'))
+    return list(dict.fromkeys(names))
+
+def get_repositories():
+    """Read the configured repository list as [{'name', 'url'}] in priority order"""
+    spec = os.environ.get(REPOS_ENV) or DEFAULT_REPOS
+    repos = []
+    seen = set()
     
-    try:
-        response = requests.get(FDROID_INDEX_URL, timeout=60)
-        response.raise_for_status()
-        print(f"✓ Downloaded index ({len(response.content)} bytes)")
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
         
-        print("Parsing XML...")
-        root = ET.fromstring(response.content)
-        apps_data = []
+        name, sep, url = entry.partition('=')
+        if not sep or not name.strip() or not url.strip():
+            print(f"✗ Invalid repository entry '{entry}' (expected name=url)", file=sys.stderr)
+            sys.exit(1)
         
-        total_apps = len(root.findall('application'))
-        print(f"Found {total_apps} applications to process")
+        name = name.strip()
+        if name in seen:
+            print(f"✗ Duplicate repository name '{name}'", file=sys.stderr)
+            sys.exit(1)
+        seen.add(name)
+        repos.append({'name': name, 'url': url.strip().rstrip('/')})
+    
+    if not repos:
+        print(f"✗ No repositories configured in {REPOS_ENV}", file=sys.stderr)
+        sys.exit(1)
+    
+    return repos
+
+def fetch_index(repo):
+    """Download a repository's index.xml and return its raw bytes"""
+    index_url = f"{repo['url']}/index.xml"
+    print(f"[{repo['name']}] Fetching index from: {index_url}")
+    
+    response = requests.get(index_url, timeout=60)
+    response.raise_for_status()
+    print(f"[{repo['name']}] ✓ Downloaded index ({len(response.content)} bytes)")
+    return response.content
+
+def parse_index(content, repo):
+    """Parse a repository index.xml into a list of app records attributed to the repository"""
+    root = ET.fromstring(content)
+    icon_base = f"{repo['url']}/icons-640"
+    apps_data = []
+    rejected = 0
+    
+    applications = root.findall('application')
+    total_apps = len(applications)
+    print(f"[{repo['name']}] Found {total_apps} applications to process")
+    
+    for idx, app_elem in enumerate(applications, 1):
+        if idx % 1000 == 0:
+            print(f"[{repo['name']}] Processing app {idx}/{total_apps}...")
         
-        for idx, app_elem in enumerate(root.findall('application'), 1):
-            if idx % 100 == 0:
-                print(f"Processing app {idx}/{total_apps}...")
-            
-            app_id = app_elem.get('id')
-            
-            app_info = {
-                'id': app_id,
-                'name': get_text(app_elem, 'name'),
-                'summary': get_text(app_elem, 'summary'),
-                'description': get_text(app_elem, 'desc'),
-                'license': get_text(app_elem, 'license'),
-                'categories': [cat.text for cat in app_elem.findall('category') if cat.text],
-                'author': get_text(app_elem, 'author'),
-                'email': get_text(app_elem, 'email'),
-                'website': get_text(app_elem, 'web'),
-                'source_code': get_text(app_elem, 'source'),
-                'issue_tracker': get_text(app_elem, 'tracker'),
-                'changelog': get_text(app_elem, 'changelog'),
-                'donate': get_text(app_elem, 'donate'),
-                'bitcoin': get_text(app_elem, 'bitcoin'),
-                'litecoin': get_text(app_elem, 'litecoin'),
-                'flattr': get_text(app_elem, 'flattr'),
-                'liberapay': get_text(app_elem, 'liberapay'),
-                'opencollective': get_text(app_elem, 'opencollective'),
-                'added': get_text(app_elem, 'added'),
-                'last_updated': get_text(app_elem, 'lastupdated'),
-                'icon': f"{FDROID_ICON_BASE}/{app_id}.png" if app_id else None,
-                'packages': []
+        app_id = app_elem.get('id')
+        if not app_id or not APP_ID_PATTERN.match(app_id):
+            rejected += 1
+            continue
+        
+        app_info = {
+            'id': app_id,
+            'name': get_text(app_elem, 'name'),
+            'summary': get_text(app_elem, 'summary'),
+            'description': get_text(app_elem, 'desc'),
+            'license': get_text(app_elem, 'license'),
+            'categories': [cat.text for cat in app_elem.findall('category') if cat.text],
+            'author': get_text(app_elem, 'author'),
+            'email': get_text(app_elem, 'email'),
+            'website': get_text(app_elem, 'web'),
+            'source_code': get_text(app_elem, 'source'),
+            'issue_tracker': get_text(app_elem, 'tracker'),
+            'changelog': get_text(app_elem, 'changelog'),
+            'donate': get_text(app_elem, 'donate'),
+            'bitcoin': get_text(app_elem, 'bitcoin'),
+            'litecoin': get_text(app_elem, 'litecoin'),
+            'flattr': get_text(app_elem, 'flattr'),
+            'liberapay': get_text(app_elem, 'liberapay'),
+            'opencollective': get_text(app_elem, 'opencollective'),
+            'added': get_text(app_elem, 'added'),
+            'last_updated': get_text(app_elem, 'lastupdated'),
+            'icon': f"{icon_base}/{app_id}.png",
+            'repo': repo['name'],
+            'packages': []
+        }
+        
+        # Parse package information
+        for pkg in app_elem.findall('package'):
+            package_info = {
+                'version_name': get_text(pkg, 'version'),
+                'version_code': get_text(pkg, 'versioncode'),
+                'apk_name': get_text(pkg, 'apkname'),
+                'hash': get_text(pkg, 'hash'),
+                'hash_type': get_text(pkg, 'hashtype'),
+                'size': get_text(pkg, 'size'),
+                'min_sdk': get_text(pkg, 'sdkver'),
+                'target_sdk': get_text(pkg, 'targetSdkVersion'),
+                'added': get_text(pkg, 'added'),
+                'permissions': get_permissions(pkg),
+                'features': get_features(pkg),
+                'nativecode': get_list(pkg, 'nativecode'),
             }
-            
-            # Parse package information
-            for pkg in app_elem.findall('package'):
-                package_info = {
-                    'version_name': get_text(pkg, 'version'),
-                    'version_code': get_text(pkg, 'versioncode'),
-                    'apk_name': get_text(pkg, 'apkname'),
-                    'hash': get_text(pkg, 'hash'),
-                    'hash_type': get_text(pkg, 'hashtype'),
-                    'size': get_text(pkg, 'size'),
-                    'min_sdk': get_text(pkg, 'sdkver'),
-                    'target_sdk': get_text(pkg, 'targetSdkVersion'),
-                    'added': get_text(pkg, 'added'),
-                    'permissions': [perm.text for perm in pkg.findall('.//uses-permission') if perm.text],
-                    'features': [feat.text for feat in pkg.findall('.//uses-feature') if feat.text],
-                    'nativecode': [nc.text for nc in pkg.findall('nativecode') if nc.text],
+            app_info['packages'].append(package_info)
+        
+        # Get latest version info
+        if app_info['packages']:
+            latest_pkg = app_info['packages'][0]
+            app_info['latest_version'] = latest_pkg['version_name']
+            app_info['latest_version_code'] = latest_pkg['version_code']
+            app_info['apk_size'] = latest_pkg['size']
+        
+        apps_data.append(app_info)
+    
+    if rejected:
+        print(f"[{repo['name']}] Skipped {rejected} applications with invalid ids")
+    print(f"[{repo['name']}] ✓ Parsed {len(apps_data)} applications successfully")
+    return apps_data
+
+def merge_repositories(repos, parsed):
+    """
+    Merge per-repository app lists into one dataset.
+    Repositories are visited in priority order and the first occurrence of an
+    app id wins, so the result does not depend on download or parse timing.
+    """
+    merged = []
+    seen = set()
+    
+    for repo in repos:
+        added = 0
+        duplicates = 0
+        for app in parsed[repo['name']]:
+            if app['id'] in seen:
+                duplicates += 1
+                continue
+            seen.add(app['id'])
+            merged.append(app)
+            added += 1
+        
+        repo['apps_count'] = added
+        if duplicates:
+            print(f"[{repo['name']}] Skipped {duplicates} apps already provided by a higher-priority repository")
+    
+    return merged
+
+def fetch_and_parse_repositories(repos):
+    """Fetch all repositories concurrently, parse them in parallel and merge the results"""
+    try:
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(repos))) as pool:
+            contents = dict(zip(
+                [repo['name'] for repo in repos],
+                pool.map(fetch_index, repos)
+            ))
+        
+        print("Parsing XML...")
+        if len(repos) > 1 and MAX_PARSE_WORKERS > 1:
+            with ProcessPoolExecutor(max_workers=min(MAX_PARSE_WORKERS, len(repos))) as pool:
+                futures = {
+                    repo['name']: pool.submit(parse_index, contents.pop(repo['name']), repo)
+                    for repo in repos
                 }
-                app_info['packages'].append(package_info)
-            
-            # Get latest version info
-            if app_info['packages']:
-                latest_pkg = app_info['packages'][0]
-                app_info['latest_version'] = latest_pkg['version_name']
-                app_info['latest_version_code'] = latest_pkg['version_code']
-                app_info['apk_size'] = latest_pkg['size']
-            
-            apps_data.append(app_info)
+                parsed = {name: future.result() for name, future in futures.items()}
+        else:
+            parsed = {repo['name']: parse_index(contents.pop(repo['name']), repo) for repo in repos}
         
-        print(f"✓ Parsed {len(apps_data)} applications successfully")
+        apps_data = merge_repositories(repos, parsed)
+        print(f"✓ Merged {len(apps_data)} applications from {len(repos)} repositories")
         return apps_data
         
     except requests.RequestException as e:
@@ -112,7 +301,15 @@ def fetch_and_parse_fdroid_index():
         print(f"✗ Unexpected error: {e}", file=sys.stderr)
         sys.exit(1)
 
-def save_cache(apps_data):
+def get_data_layout():
+    """Read the configured output layout"""
+    layout = os.environ.get(DATA_LAYOUT_ENV) or 'sharded'
+    if layout not in DATA_LAYOUTS:
+        print(f"✗ Invalid {DATA_LAYOUT_ENV} '{layout}' (expected one of {', '.join(DATA_LAYOUTS)})", file=sys.stderr)
+        sys.exit(1)
+    return layout
+
+def save_cache(apps_data, repos, last_updated, checksum):
     """Save parsed data to JSON file"""
     print(f"Saving cache to {CACHE_FILE}...")
 
@@ -120,28 +317,496 @@ def save_cache(apps_data):
     os.makedirs(CACHE_DIR, exist_ok=True)
     
     cache_data = {
-        'last_updated': datetime.utcnow().isoformat() + 'Z',
+        'last_updated': last_updated,
+        'checksum': checksum,
         'apps_count': len(apps_data),
+        'repositories': repos,
         'apps': apps_data
     }
     
     try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, separators=(',', ':'))
+        content = json.dumps(cache_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with open(CACHE_FILE, 'wb') as f:
+            f.write(content)
         
-        file_size = os.path.getsize(CACHE_FILE)
+        file_size = len(content)
         file_size_mb = file_size / (1024 * 1024)
         
-        print(f"✓ Cache saved successfully!")
+        print("✓ Cache saved successfully!")
         print(f"  File: {CACHE_FILE}")
         print(f"  Size: {file_size_mb:.2f} MB ({file_size:,} bytes)")
         print(f"  Apps: {len(apps_data):,}")
         print(f"  Updated: {cache_data['last_updated']}")
         
+        return {
+            'last_updated': cache_data['last_updated'],
+            'data_file': os.path.relpath(CACHE_FILE, CACHE_DIR),
+            'file_sha256': hashlib.sha256(content).hexdigest(),
+            'file_size': file_size
+        }
+        
     except Exception as e:
         print(f"✗ Error saving cache: {e}", file=sys.stderr)
         sys.exit(1)
 
+def shard_of(app_id):
+    """Stable shard bucket of an app id"""
+    return int(hashlib.sha256(app_id.encode('utf-8')).hexdigest()[:8], 16) % SHARD_COUNT
+
+def write_atomic(path, content):
+    """Write bytes to a file via a temporary file and rename"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def save_shards(apps_data, repos, last_updated, checksum):
+    """
+    Save the dataset as content-addressed shards plus a root file.
+    Shards with unchanged content keep their file name and are not rewritten;
+    shards no longer referenced are deleted.
+    """
+    print(f"Saving shards to {SHARDS_DIR}...")
+    os.makedirs(SHARDS_DIR, exist_ok=True)
+    
+    buckets = [[] for _ in range(SHARD_COUNT)]
+    for app in apps_data:
+        buckets[shard_of(app['id'])].append(app)
+    
+    try:
+        shards = []
+        written = 0
+        for bucket, apps in enumerate(buckets):
+            if not apps:
+                continue
+            apps.sort(key=lambda a: a['id'])
+            content = json.dumps(
+                {'apps': apps}, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+            ).encode('utf-8')
+            digest = hashlib.sha256(content).hexdigest()
+            file_name = f"{digest}.json"
+            
+            path = os.path.join(SHARDS_DIR, file_name)
+            if not os.path.exists(path):
+                write_atomic(path, content)
+                written += 1
+            
+            shards.append({
+                'bucket': bucket,
+                'file': file_name,
+                'sha256': digest,
+                'apps': len(apps),
+                'size': len(content)
+            })
+        
+        root = {
+            'format_version': SHARD_FORMAT_VERSION,
+            'last_updated': last_updated,
+            'checksum': checksum,
+            'apps_count': len(apps_data),
+            'shard_count': SHARD_COUNT,
+            'repositories': repos,
+            'order': [app['id'] for app in apps_data],
+            'shards': shards
+        }
+        root_content = json.dumps(
+            root, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+        ).encode('utf-8')
+        write_atomic(SHARD_ROOT_FILE, root_content)
+        
+        referenced = {shard['file'] for shard in shards}
+        removed = 0
+        for file_name in os.listdir(SHARDS_DIR):
+            if file_name.endswith('.json') and file_name != os.path.basename(SHARD_ROOT_FILE) \
+                    and file_name not in referenced:
+                os.remove(os.path.join(SHARDS_DIR, file_name))
+                removed += 1
+        
+        total_size = sum(shard['size'] for shard in shards)
+        print("✓ Shards saved successfully!")
+        print(f"  Shards: {len(shards)} ({written} written, {len(shards) - written} unchanged, {removed} removed)")
+        print(f"  Size: {total_size / (1024 * 1024):.2f} MB ({total_size:,} bytes)")
+        
+        return {
+            'last_updated': last_updated,
+            'data_file': os.path.relpath(SHARD_ROOT_FILE, CACHE_DIR),
+            'file_sha256': hashlib.sha256(root_content).hexdigest(),
+            'file_size': len(root_content)
+        }
+        
+    except Exception as e:
+        print(f"✗ Error saving shards: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def hash_app(app):
+    """Content hash of one app record, independent of key order"""
+    canonical = json.dumps(app, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+def dataset_checksum(app_hashes):
+    """
+    Checksum of the dataset over app contents only (not the last_updated
+    timestamp), so it changes exactly when some app changed
+    """
+    digest = hashlib.sha256()
+    for app_id in sorted(app_hashes):
+        digest.update(f"{app_id}:{app_hashes[app_id]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def load_previous_apps():
+    """
+    Describe the existing apps.json like a manifest, for the first run
+    without one, so unchanged apps are not all reported as added
+    """
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            apps = json.load(f).get('apps', [])
+        print(f"No previous manifest; comparing against {CACHE_FILE}")
+        return {'app_hashes': {app['id']: hash_app(app) for app in apps if app.get('id')}}
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Warning: could not read previous {CACHE_FILE}: {e}")
+        return None
+
+def load_previous_manifest():
+    """
+    Load the manifest of the previous run, falling back to the existing
+    apps.json; None if neither is usable
+    """
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('manifest_version') == MANIFEST_VERSION:
+            return manifest
+        print("Previous manifest has an unknown version")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read previous manifest: {e}")
+    return load_previous_apps()
+
+def build_manifest(apps_data, app_hashes, checksum, file_info, previous, layout):
+    """
+    Build the sidecar manifest for the dataset just written.
+    The checksum is the one embedded in the data file (see dataset_checksum).
+    """
+    prev_hashes = previous.get('app_hashes', {}) if previous else {}
+    added = sorted(set(app_hashes) - set(prev_hashes))
+    removed = sorted(set(prev_hashes) - set(app_hashes))
+    changed = sorted(
+        app_id for app_id, app_hash in app_hashes.items()
+        if app_id in prev_hashes and prev_hashes[app_id] != app_hash
+    )
+    
+    return {
+        'manifest_version': MANIFEST_VERSION,
+        'last_updated': file_info['last_updated'],
+        'layout': layout,
+        'data_file': file_info['data_file'],
+        'file_sha256': file_info['file_sha256'],
+        'file_size': file_info['file_size'],
+        'checksum': checksum,
+        'previous_checksum': previous.get('checksum') if previous else None,
+        'apps_count': len(apps_data),
+        'packages_count': sum(len(app.get('packages', [])) for app in apps_data),
+        'app_ids': [app['id'] for app in apps_data],
+        'app_hashes': app_hashes,
+        'changes': {
+            'added': added,
+            'removed': removed,
+            'changed': changed
+        }
+    }
+
+def save_manifest(manifest):
+    """Save the sidecar manifest next to the cache file"""
+    try:
+        with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        
+        changes = manifest['changes']
+        print(f"✓ Manifest saved to {MANIFEST_FILE}")
+        print(f"  Checksum: {manifest['checksum']}")
+        print(f"  Added: {len(changes['added'])}, Removed: {len(changes['removed'])}, Changed: {len(changes['changed'])}")
+        
+    except Exception as e:
+        print(f"✗ Error saving manifest: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def normalize_text(text):
+    """Strip accents and casefold; ASCII text skips Unicode decomposition"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+def tokenize_app(app):
+    """Weighted term counts for an app's name, summary, description and categories"""
+    counts = {}
+    for field, weight in SIMILAR_FIELD_WEIGHTS:
+        text = TAG_PATTERN.sub(' ', app.get(field) or '')
+        for token in TOKEN_PATTERN.findall(normalize_text(text)):
+            if token not in STOP_WORDS:
+                counts[token] = counts.get(token, 0) + weight
+    for category in app.get('categories') or []:
+        if category:
+            term = 'category:' + category
+            counts[term] = counts.get(term, 0) + SIMILAR_CATEGORY_WEIGHT
+    return counts
+
+def build_tfidf_matrix(apps_data):
+    """
+    Build the L2-normalized TF-IDF matrix from COO arrays.
+    Returns (float32 matrix of shape (apps, vocabulary), vocabulary size).
+    """
+    documents = [tokenize_app(app) for app in apps_data]
+    n_docs = len(documents)
+    
+    doc_freq = {}
+    for counts in documents:
+        for term in counts:
+            doc_freq[term] = doc_freq.get(term, 0) + 1
+    
+    # Terms shared by at least two apps but not by most of them
+    max_df = max(2, int(n_docs * 0.5))
+    candidates = sorted(
+        ((df, term) for term, df in doc_freq.items() if 2 <= df <= max_df),
+        key=lambda x: (-x[0], x[1])
+    )[:SIMILAR_MAX_FEATURES]
+    vocabulary = {term: col for col, (_, term) in enumerate(candidates)}
+    
+    rows, cols, counts_flat = [], [], []
+    for row, counts in enumerate(documents):
+        for term, count in counts.items():
+            col = vocabulary.get(term)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+                counts_flat.append(count)
+    
+    idf = np.log((1 + n_docs) / (1 + np.array([df for df, _ in candidates], dtype=np.float32))) + 1.0
+    cols = np.array(cols, dtype=np.int64)
+    values = (1.0 + np.log(np.array(counts_flat, dtype=np.float32))) * idf[cols]
+    
+    matrix = np.zeros((n_docs, len(vocabulary)), dtype=np.float32)
+    matrix[np.array(rows, dtype=np.int64), cols] = values
+    
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix, len(vocabulary)
+
+def top_k_neighbors(matrix, k):
+    """
+    Top-k cosine neighbors of every row, computed in row batches.
+    Returns (neighbor positions, scores) as lists of lists, most similar first.
+    """
+    n_rows = matrix.shape[0]
+    k = max(0, min(k, n_rows - 1))
+    neighbors, scores = [], []
+    if k == 0:
+        return [[] for _ in range(n_rows)], [[] for _ in range(n_rows)]
+    
+    for start in range(0, n_rows, SIMILAR_BATCH_SIZE):
+        stop = min(start + SIMILAR_BATCH_SIZE, n_rows)
+        sims = matrix[start:stop] @ matrix.T
+        # Exclude each app from its own neighbor list
+        sims[np.arange(stop - start), np.arange(start, stop)] = -1.0
+        
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        for row_top, row_scores in zip(top.tolist(), top_scores.tolist()):
+            # Drop neighbors with no shared terms
+            kept = [(pos, round(score, 4)) for pos, score in zip(row_top, row_scores) if score > 0]
+            neighbors.append([pos for pos, _ in kept])
+            scores.append([score for _, score in kept])
+    
+    return neighbors, scores
+
+def save_similarity_table(apps_data, checksum):
+    """
+    Compute the similar-apps table and save it next to the data, tagged with
+    the dataset checksum so the API never pairs it with a different snapshot.
+    """
+    if np is None:
+        print("Warning: NumPy is not installed, similar-apps table not written")
+        if os.path.exists(SIMILAR_FILE):
+            os.remove(SIMILAR_FILE)
+        return
+    
+    print("Building similar-apps table...")
+    start = time.perf_counter()
+    matrix, vocabulary_size = build_tfidf_matrix(apps_data)
+    neighbors, scores = top_k_neighbors(matrix, SIMILAR_TOP_K)
+    build_ms = round((time.perf_counter() - start) * 1000, 1)
+    
+    table = {
+        'format_version': SIMILAR_FORMAT_VERSION,
+        'checksum': checksum,
+        'top_k': SIMILAR_TOP_K,
+        'vocabulary_size': vocabulary_size,
+        'build_ms': build_ms,
+        'ids': [app['id'] for app in apps_data],
+        'neighbors': neighbors,
+        'scores': scores
+    }
+    write_atomic(SIMILAR_FILE, json.dumps(table, separators=(',', ':')).encode('utf-8'))
+    print(f"✓ Similar-apps table saved to {SIMILAR_FILE} ({vocabulary_size} terms, {build_ms} ms)")
+
+def icon_path(size, app_id, fmt):
+    """Path of one mirrored thumbnail; rejects ids that could escape the icons directory"""
+    if not APP_ID_PATTERN.match(app_id or ''):
+        raise ValueError(f"Invalid app id for icon path: {app_id!r}")
+    return os.path.join(ICONS_DIR, str(size), f"{app_id}.{fmt}")
+
+def load_icon_index():
+    """Load the icon mirror index, or an empty one"""
+    try:
+        with open(ICON_INDEX_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read icon index, rebuilding: {e}")
+        return {}
+
+def render_thumbnails(content, app_id):
+    """
+    Render square, transparent-padded thumbnails in every size and format.
+    Identical canvas sizes keep the output sprite-friendly. Every thumbnail
+    is rendered before any is written, and each write is atomic, so a bad
+    icon never leaves a partial set behind.
+    Returns {size: {format: sha256}}.
+    """
+    source = Image.open(io.BytesIO(content))
+    source.load()
+    source = source.convert('RGBA')
+    hashes = {}
+    outputs = []
+    
+    for size in ICON_SIZES:
+        thumb = source.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        canvas.paste(thumb, ((size - thumb.width) // 2, (size - thumb.height) // 2))
+        
+        hashes[str(size)] = {}
+        for fmt in ICON_FORMATS:
+            buffer = io.BytesIO()
+            if fmt == 'webp':
+                canvas.save(buffer, 'WEBP', quality=80, method=6)
+            else:
+                canvas.save(buffer, 'PNG', optimize=True)
+            data = buffer.getvalue()
+            
+            outputs.append((icon_path(size, app_id, fmt), data))
+            hashes[str(size)][fmt] = hashlib.sha256(data).hexdigest()
+    
+    for path, data in outputs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+    
+    return hashes
+
+def thumbnails_present(app_id):
+    """Check that every thumbnail of an app exists on disk"""
+    return all(
+        os.path.exists(icon_path(size, app_id, fmt))
+        for size in ICON_SIZES for fmt in ICON_FORMATS
+    )
+
+def mirror_icon(app, entry):
+    """
+    Mirror one app icon. Returns (status, entry) where status is one of
+    'not_modified', 'unchanged', 'updated' or 'failed'.
+    """
+    url = app['icon']
+    headers = {}
+    if entry and entry.get('source') == url and thumbnails_present(app['id']):
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    
+    try:
+        response = requests.get(url, headers=headers, timeout=30)
+        if response.status_code == 304:
+            return 'not_modified', entry
+        response.raise_for_status()
+        
+        content = response.content
+        source_hash = hashlib.sha256(content).hexdigest()
+        new_entry = {
+            'source': url,
+            'sha256': source_hash,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'thumbnails': entry.get('thumbnails') if entry else None
+        }
+        
+        # Same bytes as last time: keep the existing thumbnails
+        if entry and entry.get('sha256') == source_hash and thumbnails_present(app['id']):
+            return 'unchanged', new_entry
+        
+        new_entry['thumbnails'] = render_thumbnails(content, app['id'])
+        return 'updated', new_entry
+        
+    except Exception as e:
+        # Besides network and file errors, Pillow raises DecompressionBombError,
+        # ValueError and others on malformed images; one bad icon must not abort the run
+        print(f"  Warning: icon for {app['id']} not mirrored: {type(e).__name__}: {e}")
+        return 'failed', entry
+
+def mirror_icons(apps_data):
+    """Incrementally mirror app icons into local thumbnails"""
+    if Image is None:
+        print(f"✗ {MIRROR_ICONS_ENV}=1 requires Pillow (pip install Pillow)", file=sys.stderr)
+        sys.exit(1)
+    
+    print(f"Mirroring icons to {ICONS_DIR}...")
+    index = load_icon_index()
+    apps_with_icons = [
+        app for app in apps_data
+        if app.get('icon') and APP_ID_PATTERN.match(app.get('id') or '')
+    ]
+    
+    with ThreadPoolExecutor(max_workers=MAX_ICON_WORKERS) as pool:
+        results = list(pool.map(
+            lambda app: (app['id'],) + mirror_icon(app, index.get(app['id'])),
+            apps_with_icons
+        ))
+    
+    counts = {'not_modified': 0, 'unchanged': 0, 'updated': 0, 'failed': 0}
+    new_index = {}
+    for app_id, status, entry in results:
+        counts[status] += 1
+        if entry:
+            new_index[app_id] = entry
+    
+    # Drop thumbnails of apps that left the dataset
+    removed = sorted(set(index) - {app['id'] for app in apps_with_icons})
+    for app_id in removed:
+        if not APP_ID_PATTERN.match(app_id):
+            continue
+        for size in ICON_SIZES:
+            for fmt in ICON_FORMATS:
+                path = icon_path(size, app_id, fmt)
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    os.makedirs(ICONS_DIR, exist_ok=True)
+    write_atomic(ICON_INDEX_FILE, json.dumps(
+        new_index, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    ).encode('utf-8'))
+    
+    print(f"✓ Icons: {counts['updated']} updated, {counts['unchanged'] + counts['not_modified']} unchanged, "
+          f"{counts['failed']} failed, {len(removed)} removed")
+
 def main():
     """Main execution function"""
     print("=" * 60)
@@ -150,11 +815,34 @@ def main():
     print(f"Started at: {datetime.utcnow().isoformat()}Z")
     print()
     
-    # Fetch and parse the index
-    apps_data = fetch_and_parse_fdroid_index()
+    # Fetch, parse and merge the repository indexes
+    repos = get_repositories()
+    apps_data = fetch_and_parse_repositories(repos)
+    
+    # Save in the configured layout and describe it in the manifest
+    layout = get_data_layout()
+    last_updated = datetime.utcnow().isoformat() + 'Z'
+    previous_manifest = load_previous_manifest()
+    
+    app_hashes = {app['id']: hash_app(app) for app in apps_data}
+    checksum = dataset_checksum(app_hashes)
+    
+    file_info = None
+    if layout in ('single', 'both'):
+        file_info = save_cache(apps_data, repos, last_updated, checksum)
+    elif os.path.exists(CACHE_FILE):
+        # A stale single file would shadow nothing but confuse consumers
+        os.remove(CACHE_FILE)
+        print(f"Removed {CACHE_FILE} (layout is {layout})")
+    if layout in ('sharded', 'both'):
+        file_info = save_shards(apps_data, repos, last_updated, checksum)
+    
+    save_manifest(build_manifest(apps_data, app_hashes, checksum, file_info, previous_manifest, layout))
+    save_similarity_table(apps_data, checksum)
     
-    # Save to cache file
-    save_cache(apps_data)
+    # Mirror icons and render thumbnails
+    if os.environ.get(MIRROR_ICONS_ENV) == '1':
+        mirror_icons(apps_data)
     
     print()
     print("=" * 60)
@@ -0,0 +1,296 @@
+"""
+Tests for multi-repository ingestion and icon mirroring in
+scripts/update_data.py. Fixture repositories and icons are served by a
+local HTTP server.
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import update_data  # noqa: E402
+
+
+MAIN_INDEX = """<?xml version="1.0" encoding="utf-8"?>
+<fdroid>
+  <application id="org.example.notes">
+    <name>Notes</name>
+    <category>Writing</category>
+    <package>
+      <version>2.0</version>
+      <versioncode>20</versioncode>
+      <hash type="sha256">aa</hash>
+      <sdkver>21</sdkver>
+      <permissions>INTERNET,WRITE_EXTERNAL_STORAGE</permissions>
+      <uses-permission name="android.permission.WRITE_EXTERNAL_STORAGE" maxSdkVersion="18"/>
+      <features>android.hardware.camera</features>
+      <nativecode>arm64-v8a,x86</nativecode>
+    </package>
+  </application>
+  <application id="org.example.shared">
+    <name>Shared (main)</name>
+    <package>
+      <version>1.0</version>
+      <versioncode>1</versioncode>
+    </package>
+  </application>
+</fdroid>
+"""
+
+EXTRA_INDEX = """<?xml version="1.0" encoding="utf-8"?>
+<fdroid>
+  <application id="org.example.shared">
+    <name>Shared (extra)</name>
+  </application>
+  <application id="com.example.player">
+    <name>Player</name>
+  </application>
+  <application id="../../etc/evil">
+    <name>Evil</name>
+  </application>
+  <application id="nodots">
+    <name>No Dots</name>
+  </application>
+</fdroid>
+"""
+
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    """Serves fixture files, delaying the main repository so it finishes last."""
+
+    def do_GET(self):
+        if self.path.startswith('/main/'):
+            time.sleep(0.3)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MultiRepositoryTest(unittest.TestCase):
+    """Fetch, parse and merge against a stand-in HTTP server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.TemporaryDirectory()
+        for name, content in (('main', MAIN_INDEX), ('extra', EXTRA_INDEX)):
+            os.makedirs(os.path.join(cls.root.name, name))
+            with open(os.path.join(cls.root.name, name, 'index.xml'), 'w') as f:
+                f.write(content)
+
+        handler = partial(SlowHandler, directory=cls.root.name)
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.root.cleanup()
+
+    def fetch(self, parse_workers):
+        repos = [
+            {'name': 'main', 'url': f"{self.base_url}/main"},
+            {'name': 'extra', 'url': f"{self.base_url}/extra"},
+        ]
+        previous = update_data.MAX_PARSE_WORKERS
+        update_data.MAX_PARSE_WORKERS = parse_workers
+        try:
+            return repos, update_data.fetch_and_parse_repositories(repos)
+        finally:
+            update_data.MAX_PARSE_WORKERS = previous
+
+    def check_merge(self, repos, apps):
+        self.assertEqual(
+            [app['id'] for app in apps],
+            ['org.example.notes', 'org.example.shared', 'com.example.player']
+        )
+        self.assertEqual(
+            [app['repo'] for app in apps],
+            ['main', 'main', 'extra']
+        )
+        self.assertEqual(apps[1]['name'], 'Shared (main)')
+        self.assertEqual([repo['apps_count'] for repo in repos], [2, 1])
+
+    def test_merge_in_priority_order_with_process_pool(self):
+        self.check_merge(*self.fetch(parse_workers=2))
+
+    def test_merge_in_priority_order_inline(self):
+        self.check_merge(*self.fetch(parse_workers=1))
+
+    def test_invalid_ids_are_rejected(self):
+        _, apps = self.fetch(parse_workers=1)
+        ids = {app['id'] for app in apps}
+        self.assertNotIn('../../etc/evil', ids)
+        self.assertNotIn('nodots', ids)
+
+    def test_package_lists(self):
+        _, apps = self.fetch(parse_workers=1)
+        package = apps[0]['packages'][0]
+        self.assertEqual(package['permissions'], [
+            'android.permission.INTERNET',
+            'android.permission.WRITE_EXTERNAL_STORAGE',
+        ])
+        self.assertEqual(package['features'], ['android.hardware.camera'])
+        self.assertEqual(package['nativecode'], ['arm64-v8a', 'x86'])
+
+
+class IconHandler(BaseHTTPRequestHandler):
+    """Serves in-memory icons, answering If-None-Match with 304 when the ETag matches."""
+
+    def do_GET(self):
+        icon = self.server.icons.get(self.path)
+        if icon is None:
+            self.send_error(404)
+            return
+        content, etag = icon
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(content)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def png_bytes(width, height, color):
+    image = update_data.Image.new('RGBA', (width, height), color)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@unittest.skipIf(update_data.Image is None, 'Pillow is not installed')
+class IconMirrorTest(unittest.TestCase):
+    """Incremental icon mirroring against a stand-in icon host."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), IconHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.icons = {
+            '/notes.png': (png_bytes(120, 60, (255, 0, 0, 255)), '"notes-1"'),
+            '/player.png': (png_bytes(64, 64, (0, 0, 255, 255)), None),
+        }
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        icons_dir = os.path.join(self.dir.name, 'icons')
+        for name, value in (('ICONS_DIR', icons_dir),
+                            ('ICON_INDEX_FILE', os.path.join(icons_dir, 'index.json'))):
+            patcher = mock.patch.object(update_data, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.apps = [
+            {'id': 'org.example.notes', 'icon': f"{self.base_url}/notes.png"},
+            {'id': 'com.example.player', 'icon': f"{self.base_url}/player.png"},
+        ]
+
+    def mirror(self, apps):
+        """Run mirror_icons; returns the index written and the log output."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            update_data.mirror_icons(apps)
+        return update_data.load_icon_index(), output.getvalue()
+
+    def thumbnail_paths(self, app_id):
+        return [
+            update_data.icon_path(size, app_id, fmt)
+            for size in update_data.ICON_SIZES for fmt in update_data.ICON_FORMATS
+        ]
+
+    def test_thumbnail_sizes_and_formats(self):
+        index, _ = self.mirror(self.apps)
+        entry = index['org.example.notes']
+        self.assertEqual(entry['etag'], '"notes-1"')
+        self.assertEqual(sorted(entry['thumbnails']), sorted(str(s) for s in update_data.ICON_SIZES))
+
+        for size in update_data.ICON_SIZES:
+            for fmt in update_data.ICON_FORMATS:
+                path = update_data.icon_path(size, 'org.example.notes', fmt)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self.assertEqual(hashlib.sha256(data).hexdigest(), entry['thumbnails'][str(size)][fmt])
+                with update_data.Image.open(io.BytesIO(data)) as image:
+                    self.assertEqual(image.format, fmt.upper())
+                    self.assertEqual(image.size, (size, size))
+                    image = image.convert('RGBA')
+                    # The 2:1 source is centred on a transparent square canvas
+                    self.assertEqual(image.getpixel((size // 2, 0))[3], 0)
+                    self.assertEqual(image.getpixel((size // 2, size // 2))[3], 255)
+
+    def test_not_modified_and_unchanged_icons_are_not_rendered_again(self):
+        first, _ = self.mirror(self.apps)
+        with mock.patch.object(update_data, 'render_thumbnails',
+                               wraps=update_data.render_thumbnails) as render:
+            second, output = self.mirror(self.apps)
+        # notes gets a 304 from its ETag; player has no validators, but the
+        # downloaded bytes hash the same as last time
+        render.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertIn('0 updated, 2 unchanged, 0 failed, 0 removed', output)
+
+    def test_changed_icon_is_rendered_again(self):
+        first, _ = self.mirror(self.apps)
+        self.server.icons['/player.png'] = (png_bytes(64, 64, (0, 255, 0, 255)), None)
+        second, output = self.mirror(self.apps)
+        self.assertNotEqual(second['com.example.player']['sha256'], first['com.example.player']['sha256'])
+        self.assertEqual(second['org.example.notes'], first['org.example.notes'])
+        self.assertIn('1 updated, 1 unchanged', output)
+
+    def test_bad_image_keeps_previous_entry(self):
+        first, _ = self.mirror(self.apps)
+        self.server.icons['/notes.png'] = (b'not an image', '"notes-2"')
+        self.server.icons['/player.png'] = (png_bytes(32, 32, (0, 255, 0, 255)), None)
+        second, output = self.mirror(self.apps)
+
+        self.assertIn('Warning: icon for org.example.notes not mirrored', output)
+        self.assertIn('1 updated, 0 unchanged, 1 failed', output)
+        self.assertEqual(second['org.example.notes'], first['org.example.notes'])
+        self.assertTrue(all(os.path.exists(path) for path in self.thumbnail_paths('org.example.notes')))
+        self.assertNotEqual(second['com.example.player'], first['com.example.player'])
+
+    def test_bad_image_without_previous_entry_is_skipped(self):
+        self.server.icons['/notes.png'] = (b'not an image', None)
+        index, _ = self.mirror(self.apps)
+        self.assertNotIn('org.example.notes', index)
+        self.assertIn('com.example.player', index)
+        self.assertFalse(any(os.path.exists(path) for path in self.thumbnail_paths('org.example.notes')))
+
+    def test_thumbnails_of_removed_apps_are_deleted(self):
+        self.mirror(self.apps)
+        index, output = self.mirror(self.apps[1:])
+        self.assertEqual(list(index), ['com.example.player'])
+        self.assertFalse(any(os.path.exists(path) for path in self.thumbnail_paths('org.example.notes')))
+        self.assertTrue(all(os.path.exists(path) for path in self.thumbnail_paths('com.example.player')))
+        self.assertIn('1 removed', output)
+
+
+if __name__ == '__main__':
+    unittest.main()